@@ -10,6 +10,9 @@ from config import active_config
 from routes.upload import upload_bp
 from routes.movies import movies_bp
 
+# Import CLI commands
+from cli import indexes_command, ingest_command, snapshot_command
+
 def create_app(config=None):
     """
     Create and configure the Flask application.
@@ -37,9 +40,20 @@ def create_app(config=None):
     # Enable CORS for frontend
     CORS(app)
     
-    # Register blueprints
-    app.register_blueprint(upload_bp)
-    app.register_blueprint(movies_bp)
+    # Register blueprints for this process's role; read-only workers
+    # never load the ingestion stack
+    role = app.config.get('APP_ROLE', 'all')
+    if role not in ('all', 'read', 'ingest'):
+        raise ValueError(f"Unknown APP_ROLE: {role}")
+    if role in ('all', 'ingest'):
+        app.register_blueprint(upload_bp)
+    if role in ('all', 'read'):
+        app.register_blueprint(movies_bp)
+    
+    # Register CLI commands (flask ingest ..., flask snapshot, flask indexes)
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(indexes_command)
+    app.cli.add_command(snapshot_command)
     
     # Create upload folder if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
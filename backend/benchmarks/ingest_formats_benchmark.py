@@ -0,0 +1,148 @@
+"""
+Compare end-to-end ingestion time per input format.
+
+Run from the backend directory:
+    python benchmarks/ingest_formats_benchmark.py --rows 500000
+    python benchmarks/ingest_formats_benchmark.py --mongo-uri mongodb://localhost:27017/imdb_bench
+    python benchmarks/ingest_formats_benchmark.py --parse-only
+
+A synthetic catalog is written as CSV, TSV, gzip and zstd compressed
+CSV/TSV and Parquet, and each file is ingested with services.ingest.ingest_file,
+the same path as uploads and `flask ingest`, into a scratch database whose
+movies and manifest collections are recreated before every format and
+dropped afterwards. --parse-only stops after CSVProcessor's _transform_chunk
+and needs no MongoDB. Formats whose optional package (zstandard, pyarrow)
+is missing are skipped.
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.csv_processor import CSVProcessor  # noqa: E402
+
+DEFAULT_MONGO_URI = 'mongodb://localhost:27017/imdb_format_benchmark'
+
+LANGUAGES = ['en', 'fr', 'de', 'es', 'it', 'ja', 'ko', 'hi']
+GENRES = ['Drama', 'Comedy', 'Action', 'Thriller', 'Romance', 'Horror', 'Documentary']
+
+
+def make_catalog(rows, seed=42):
+    """Build a synthetic catalog with the columns of the sample CSV."""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'title': [f"Movie {i}" for i in range(rows)],
+        'original_title': [f"Original {i}" for i in range(rows)],
+        'release_date': [
+            f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            for _ in range(rows)
+        ],
+        'language': [rng.choice(LANGUAGES) for _ in range(rows)],
+        'vote_average': [round(rng.uniform(1, 10), 1) for _ in range(rows)],
+        'vote_count': [rng.randint(0, 50000) for _ in range(rows)],
+        'runtime': [rng.randint(60, 200) for _ in range(rows)],
+        'genres': [','.join(rng.sample(GENRES, rng.randint(1, 3))) for _ in range(rows)],
+        'overview': ["A synthetic overview used for benchmarking ingestion." for _ in range(rows)],
+    })
+
+
+def write_inputs(df, directory):
+    """Write the catalog in every supported format and return {label: path}."""
+    paths = {}
+    for label, sep in (('csv', ','), ('tsv', '\t')):
+        path = os.path.join(directory, f"catalog.{label}")
+        df.to_csv(path, sep=sep, index=False)
+        paths[label] = path
+
+        with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb', compresslevel=6) as dst:
+            dst.write(src.read())
+        paths[f"{label}.gz"] = f"{path}.gz"
+
+        try:
+            import zstandard
+            with open(path, 'rb') as src, open(f"{path}.zst", 'wb') as dst:
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+            paths[f"{label}.zst"] = f"{path}.zst"
+        except ImportError:
+            pass
+
+    try:
+        path = os.path.join(directory, 'catalog.parquet')
+        df.to_parquet(path, index=False)
+        paths['parquet'] = path
+    except ImportError:
+        pass
+    return paths
+
+
+def parse(path, chunk_size):
+    """Parse one file without writing it and return (rows, seconds)."""
+    rows = 0
+    start = time.perf_counter()
+    for chunk in CSVProcessor(path).process_in_chunks(chunk_size=chunk_size):
+        rows += len(chunk)
+    return rows, time.perf_counter() - start
+
+
+def ingest(path, chunk_size, db):
+    """Ingest one file into freshly created collections and return (rows, seconds)."""
+    from models.ingest_manifest import IngestManifest
+    from models.movie import Movie
+    from services.ingest import ingest_file
+
+    db.movies.drop()
+    db.ingest_manifest.drop()
+    movie_model = Movie(db=db)
+    manifest = IngestManifest(db=db)
+    # The models only create indices once per process; recreate them after the drop
+    movie_model.create_indices()
+    manifest.create_indices()
+
+    start = time.perf_counter()
+    stats = ingest_file(path, movie_model, manifest, chunk_size=chunk_size, force=True)
+    return stats['rows_read'], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='Synthetic rows (default: 200000)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per chunk (default: 5000)')
+    parser.add_argument('--mongo-uri', default=DEFAULT_MONGO_URI,
+                        help=f'Scratch database to ingest into (default: {DEFAULT_MONGO_URI})')
+    parser.add_argument('--parse-only', action='store_true',
+                        help='Only parse the files, without writing to MongoDB')
+    args = parser.parse_args()
+
+    client = db = None
+    if not args.parse_only:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        db = client.get_database()
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_inputs(make_catalog(args.rows), directory)
+
+            print(f"{'format':<10} {'size (MB)':>10} {'seconds':>9} {'rows/s':>10}")
+            for label, path in paths.items():
+                if db is None:
+                    rows, seconds = parse(path, args.chunk_size)
+                else:
+                    rows, seconds = ingest(path, args.chunk_size, db)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                print(f"{label:<10} {size_mb:>10.1f} {seconds:>9.2f} {rows / seconds:>10,.0f}")
+    finally:
+        if client is not None:
+            client.drop_database(db.name)
+            client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,475 @@
+"""
+Replay a mixed API traffic log against a running app and report latency.
+
+Run from the backend directory, against an app that is already running:
+    python benchmarks/load_test.py --url http://localhost:5000 --synthetic --rps 200 --duration 60
+
+Or start a scratch mongod, seed it with a synthetic catalog and start the
+app (under gunicorn) for the run:
+    python benchmarks/load_test.py --start-mongod --start-app --synthetic \\
+        --concurrency 32 --duration 60 --ingest-file /data/movies.csv --ingest-at 20
+
+The request log is JSONL, one request per line:
+    {"method": "GET", "path": "/api/movies", "params": {"page": 3, "language": "en"}}
+    {"method": "GET", "path": "/api/movies/filters"}
+    {"method": "POST", "path": "/api/upload", "file": "/data/movies.csv"}
+An optional "at" field (seconds from the start) replays the recorded timing.
+Without a log, --synthetic generates the usual mix of list and /filters
+calls, plus occasional uploads when --upload-file is given. Uploads are sent
+with force=true so a file is parsed and checked row by row every time
+instead of being skipped as already ingested; set "force": false on a log
+entry to keep the manifest check.
+
+With --rps requests are sent on a fixed schedule (open loop), so slow
+responses do not lower the offered load, and latency is measured from the
+scheduled send time: time spent waiting for a free sender thread counts,
+so a stalled server is not hidden (coordinated omission). With
+--concurrency each worker sends its next request as soon as the previous
+one returns (closed loop).
+--ingest-file uploads a file in the background during the run, and read
+latency is reported separately for the time the ingestion was running.
+
+With --start-mongod the scratch database is seeded with --seed-rows
+synthetic movies (default: 50000) through `flask ingest` before the app
+starts, so reads hit a populated catalog.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SORT_FIELDS = ['release_date', 'ratings', 'title', 'year']
+LANGUAGES = ['en', 'fr', 'de', 'es', 'it', 'ja']
+GENRES = ['Drama', 'Comedy', 'Action', 'Thriller', 'Romance']
+
+
+def synthetic_request(rng, upload_file=None, upload_ratio=0.01):
+    """Generate one request of the typical traffic mix."""
+    if upload_file and rng.random() < upload_ratio:
+        return {'method': 'POST', 'path': '/api/upload', 'file': upload_file}
+    if rng.random() < 0.2:
+        return {'method': 'GET', 'path': '/api/movies/filters'}
+
+    params = {
+        'page': rng.choice([1, 1, 1, 2, 3, rng.randint(1, 200)]),
+        'per_page': rng.choice([10, 10, 25, 50]),
+        'sort_by': rng.choice(SORT_FIELDS),
+        'sort_order': rng.choice(['asc', 'desc']),
+    }
+    if rng.random() < 0.4:
+        params['language'] = ','.join(rng.sample(LANGUAGES, rng.randint(1, 2)))
+    if rng.random() < 0.3:
+        start = rng.randint(1960, 2015)
+        params['year_min'], params['year_max'] = start, start + rng.randint(0, 15)
+    elif rng.random() < 0.2:
+        params['year'] = rng.randint(1960, 2024)
+    if rng.random() < 0.2:
+        params['rating_min'] = rng.choice([5, 6, 7, 8])
+    if rng.random() < 0.2:
+        params['genres'] = rng.choice(GENRES)
+    return {'method': 'GET', 'path': '/api/movies', 'params': params}
+
+
+def load_log(path):
+    """Read a JSONL request log."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def endpoint_label(request):
+    return f"{request.get('method', 'GET')} {request['path']}"
+
+
+def encode_multipart(file_path, fields=None):
+    """Build a multipart/form-data body with the file in the 'file' field and extra form fields."""
+    boundary = uuid.uuid4().hex
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    head = ''.join(
+        f"--{boundary}\r\n"
+        f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+        f"{value}\r\n"
+        for name, value in (fields or {}).items()
+    )
+    head = head.encode() + (
+        f"--{boundary}\r\n"
+        f"Content-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(file_path)}\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    body = head + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class Recorder:
+    """Thread-safe store of (label, start, latency, ok) samples."""
+
+    def __init__(self):
+        self.samples = []
+        self.ingest_windows = []
+        self._lock = threading.Lock()
+
+    def add(self, label, start, latency, ok):
+        with self._lock:
+            self.samples.append((label, start, latency, ok))
+
+    def start_ingest(self):
+        """Open an ingestion window and return its index."""
+        with self._lock:
+            self.ingest_windows.append([time.monotonic(), None])
+            return len(self.ingest_windows) - 1
+
+    def end_ingest(self, index):
+        with self._lock:
+            self.ingest_windows[index][1] = time.monotonic()
+
+    def close_ingest_windows(self, end):
+        """Treat ingestions still running at the end of the run as ending there."""
+        with self._lock:
+            for window in self.ingest_windows:
+                if window[1] is None:
+                    window[1] = end
+
+    def during_ingest(self, timestamp):
+        return any(start <= timestamp <= end for start, end in self.ingest_windows)
+
+
+def send(base_url, request, recorder, timeout, scheduled=None):
+    """
+    Send one request and record its latency and outcome.
+
+    Latency is measured from scheduled (a time.monotonic() value) when
+    given, otherwise from the moment the request is sent.
+    """
+    method = request.get('method', 'GET').upper()
+    url = base_url + request['path']
+    if request.get('params'):
+        url += '?' + urllib.parse.urlencode(request['params'], doseq=True)
+
+    data, headers = None, {}
+    if request.get('file'):
+        fields = {'force': 'true'} if request.get('force', True) else None
+        data, headers['Content-Type'] = encode_multipart(request['file'], fields)
+
+    start = scheduled if scheduled is not None else time.monotonic()
+    try:
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except urllib.error.HTTPError as e:
+        e.read()
+        ok = False
+    except OSError:
+        ok = False
+    recorder.add(endpoint_label(request), start, time.monotonic() - start, ok)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """Aggregate samples per endpoint label."""
+    by_label = {}
+    for label, _, latency, ok in samples:
+        by_label.setdefault(label, []).append((latency, ok))
+
+    rows = []
+    for label in sorted(by_label):
+        latencies = sorted(latency for latency, _ in by_label[label])
+        errors = sum(1 for _, ok in by_label[label] if not ok)
+        rows.append({
+            'endpoint': label,
+            'count': len(latencies),
+            'throughput': len(latencies) / elapsed if elapsed else 0,
+            'error_rate': errors / len(latencies),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+        })
+    return rows
+
+
+def print_table(title, rows):
+    print(title)
+    print(f"  {'endpoint':<26} {'count':>7} {'req/s':>8} {'errors':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        print(f"  {row['endpoint']:<26} {row['count']:>7} {row['throughput']:>8.1f} "
+              f"{row['error_rate']:>7.1%} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f}")
+
+
+def request_stream(args, rng, cycle=True):
+    """Yield requests from the log (cycled unless replaying timings) or the synthetic mix."""
+    if args.log:
+        entries = load_log(args.log)
+        while True:
+            for entry in entries:
+                yield entry
+            if not cycle:
+                return
+    while True:
+        yield synthetic_request(rng, args.upload_file, args.upload_ratio)
+
+
+def run_open_loop(args, base_url, recorder, rng, deadline):
+    """Send requests on a fixed schedule (--rps) or the recorded one ("at")."""
+    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+        start = time.monotonic()
+        for index, request in enumerate(request_stream(args, rng, cycle=bool(args.rps))):
+            if args.rps:
+                send_at = start + index / args.rps
+            else:
+                send_at = start + request.get('at', 0) / args.speed
+            if send_at >= deadline:
+                break
+            delay = send_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, base_url, request, recorder, args.timeout, send_at)
+
+
+def run_closed_loop(args, base_url, recorder, rng, deadline):
+    """Keep --concurrency requests in flight until the deadline."""
+    stream = request_stream(args, rng)
+    stream_lock = threading.Lock()
+
+    def worker():
+        while time.monotonic() < deadline:
+            with stream_lock:
+                request = next(stream)
+            send(base_url, request, recorder, args.timeout)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def background_ingest(args, base_url, recorder, run_start):
+    """Upload --ingest-file once, --ingest-at seconds into the run."""
+    time.sleep(max(0, run_start + args.ingest_at - time.monotonic()))
+    window = recorder.start_ingest()
+    send(base_url, {'method': 'POST', 'path': '/api/upload', 'file': args.ingest_file},
+         recorder, timeout=None)
+    recorder.end_ingest(window)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(check, timeout, what):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{what} did not start within {timeout}s")
+
+
+def start_mongod(workdir):
+    """Start a scratch mongod and return (process, uri)."""
+    if not shutil.which('mongod'):
+        raise RuntimeError('mongod was not found on PATH')
+    port = free_port()
+    dbpath = os.path.join(workdir, 'db')
+    os.makedirs(dbpath)
+    process = subprocess.Popen(
+        ['mongod', '--dbpath', dbpath, '--port', str(port), '--bind_ip', '127.0.0.1'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for(lambda: socket.create_connection(('127.0.0.1', port), timeout=1).close() is None,
+             30, 'mongod')
+    return process, f"mongodb://127.0.0.1:{port}/imdb_loadtest"
+
+
+def app_env(mongo_uri, workdir, **extra):
+    """Environment for app processes, keeping their files inside workdir."""
+    env = dict(
+        os.environ,
+        FLASK_APP='app.py',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        CATALOG_SNAPSHOT_DIR=os.path.join(workdir, 'catalog'),
+        **extra
+    )
+    if mongo_uri:
+        env['MONGO_URI'] = mongo_uri
+    return env
+
+
+def write_seed_catalog(path, rows, seed):
+    """Write a synthetic catalog CSV covering the languages, genres and years queried."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'original_title', 'release_date', 'language',
+                         'vote_average', 'vote_count', 'runtime', 'genres'])
+        for i in range(rows):
+            writer.writerow([
+                f"Movie {i}",
+                f"Original {i}",
+                f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                rng.choice(LANGUAGES),
+                round(rng.uniform(1, 10), 1),
+                rng.randint(0, 50000),
+                rng.randint(60, 200),
+                ','.join(rng.sample(GENRES, rng.randint(1, 3))),
+            ])
+
+
+def seed_catalog(mongo_uri, rows, workdir, seed):
+    """Ingest a synthetic catalog with `flask ingest` and return the seconds taken."""
+    path = os.path.join(workdir, 'seed_catalog.csv')
+    write_seed_catalog(path, rows, seed)
+    start = time.monotonic()
+    subprocess.run(
+        [sys.executable, '-m', 'flask', 'ingest', path, '--chunk-size', '5000'],
+        cwd=BACKEND_DIR, env=app_env(mongo_uri, workdir),
+        stdout=subprocess.DEVNULL, check=True
+    )
+    return time.monotonic() - start
+
+
+def start_app(mongo_uri, workers, workdir):
+    """Start the app under gunicorn and return (process, base_url)."""
+    port = free_port()
+    env = app_env(mongo_uri, workdir,
+                  GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_WORKERS=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(lambda: urllib.request.urlopen(base_url + '/', timeout=1).status == 200, 60, 'app')
+    return process, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log', help='JSONL request log to replay')
+    source.add_argument('--synthetic', action='store_true', help='Generate the typical traffic mix')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--rps', type=float, help='Target requests per second (open loop)')
+    load.add_argument('--concurrency', type=int, help='Requests kept in flight (closed loop)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default: 30)')
+    parser.add_argument('--url', default='http://localhost:5000', help='Base URL of a running app')
+    parser.add_argument('--start-app', action='store_true', help='Start the app under gunicorn for the run')
+    parser.add_argument('--app-workers', type=int, default=4, help='Gunicorn workers with --start-app')
+    parser.add_argument('--start-mongod', action='store_true', help='Start a scratch mongod for the run')
+    parser.add_argument('--seed-rows', type=int,
+                        help='Synthetic movies ingested into the scratch mongod (default: 50000)')
+    parser.add_argument('--upload-file', help='File uploaded by synthetic upload requests')
+    parser.add_argument('--upload-ratio', type=float, default=0.01,
+                        help='Share of synthetic requests that are uploads (default: 0.01)')
+    parser.add_argument('--ingest-file', help='File uploaded once in the background during the run')
+    parser.add_argument('--ingest-at', type=float, default=10,
+                        help='Seconds into the run to start --ingest-file (default: 10)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed for logs with "at" timings')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--max-workers', type=int, default=256, help='Sender threads in open-loop mode')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the synthetic traffic')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    timed_replay = bool(args.log) and not args.rps and not args.concurrency
+    if timed_replay and not any('at' in entry for entry in load_log(args.log)):
+        timed_replay = False
+    if not args.rps and not args.concurrency and not timed_replay:
+        args.concurrency = 16
+    if args.start_mongod and not args.start_app:
+        parser.error('--start-mongod requires --start-app')
+    if args.seed_rows and not args.start_mongod:
+        parser.error('--seed-rows requires --start-mongod')
+    if args.seed_rows is None:
+        args.seed_rows = 50000 if args.start_mongod else 0
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    processes = []
+    workdir = tempfile.mkdtemp(prefix='imdb_loadtest_')
+    try:
+        base_url = args.url.rstrip('/')
+        mongo_uri = None
+        if args.start_mongod:
+            process, mongo_uri = start_mongod(workdir)
+            processes.append(process)
+            if args.seed_rows:
+                seconds = seed_catalog(mongo_uri, args.seed_rows, workdir, args.seed)
+                print(f"Seeded {args.seed_rows} movies in {seconds:.1f}s")
+        if args.start_app:
+            process, base_url = start_app(mongo_uri, args.app_workers, workdir)
+            processes.append(process)
+
+        run_start = time.monotonic()
+        deadline = run_start + args.duration
+        if args.ingest_file:
+            threading.Thread(target=background_ingest,
+                             args=(args, base_url, recorder, run_start), daemon=True).start()
+
+        if args.concurrency:
+            run_closed_loop(args, base_url, recorder, rng, deadline)
+        else:
+            run_open_loop(args, base_url, recorder, rng, deadline)
+        elapsed = time.monotonic() - run_start
+        recorder.close_ingest_windows(time.monotonic())
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    samples = list(recorder.samples)
+    results = {'elapsed_seconds': elapsed, 'overall': summarize(samples, elapsed)}
+    print(f"Sent {len(samples)} requests in {elapsed:.1f}s ({len(samples) / elapsed:.1f} req/s)")
+    print_table('All requests:', results['overall'])
+
+    if recorder.ingest_windows:
+        ingest_time = sum(end - start for start, end in recorder.ingest_windows)
+        reads = [s for s in samples if not s[0].startswith('POST')]
+        during = [s for s in reads if recorder.during_ingest(s[1])]
+        idle = [s for s in reads if not recorder.during_ingest(s[1])]
+        results['reads_idle'] = summarize(idle, elapsed - ingest_time)
+        results['reads_during_ingest'] = summarize(during, ingest_time)
+        print()
+        print(f"Background ingestion ran for {ingest_time:.1f}s")
+        print_table('Reads without ingestion:', results['reads_idle'])
+        print_table('Reads during ingestion:', results['reads_during_ingest'])
+    else:
+        print("\nNo ingestion ran; use --ingest-file to compare read latency during ingestion.")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
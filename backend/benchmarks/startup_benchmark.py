@@ -0,0 +1,169 @@
+"""
+Measure worker startup cost: app import time and resident memory.
+
+Run from the backend directory:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --gunicorn --workers 4
+
+The import benchmark starts a fresh interpreter per role and reports the
+time to import app.py, the RSS afterwards and whether pandas was loaded.
+"eager" imports the ingestion stack up front, as every worker used to.
+
+With --gunicorn, gunicorn is started with and without preload_app and the
+RSS and PSS (proportional set size, which splits shared pages between
+processes) of each worker are read from /proc. Linux only.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import app
+if {eager}:
+    import services.ingest
+elapsed = time.perf_counter() - start
+rss_kb = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{'seconds': elapsed, 'rss_kb': rss_kb, 'pandas': 'pandas' in sys.modules}}))
+"""
+
+
+def measure_import(role, eager, repeat):
+    """Import the app in fresh interpreters and return the median measurements."""
+    env = dict(os.environ, APP_ROLE=role)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SNIPPET.format(eager=eager)],
+            cwd=BACKEND_DIR, env=env
+        )
+        runs.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'rss_kb': statistics.median(run['rss_kb'] for run in runs),
+        'pandas': runs[0]['pandas'],
+    }
+
+
+def read_memory_kb(pid):
+    """Return (rss_kb, pss_kb) of a process from /proc."""
+    values = {'Rss:': 0, 'Pss:': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key = line.split()[0]
+            if key in values:
+                values[key] = int(line.split()[1])
+    return values['Rss:'], values['Pss:']
+
+
+def child_pids(parent_pid):
+    """List the pids whose parent is parent_pid."""
+    children = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # The command name may contain spaces, the ppid follows the closing paren
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(name))
+    return children
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_gunicorn(workers, preload, role):
+    """Start gunicorn, wait until all workers answer and return per-worker memory."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        APP_ROLE=role,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_PRELOAD='true' if preload else 'false',
+    )
+    start = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1).read()
+                if len(child_pids(master.pid)) >= workers:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.1)
+        else:
+            raise RuntimeError('gunicorn did not become ready within 60s')
+        ready_seconds = time.perf_counter() - start
+
+        # Let every worker finish booting before sampling memory
+        time.sleep(1)
+        memory = [read_memory_kb(pid) for pid in child_pids(master.pid)]
+        return {
+            'ready_seconds': ready_seconds,
+            'master_rss_kb': read_memory_kb(master.pid)[0],
+            'worker_rss_kb': statistics.mean(rss for rss, _ in memory),
+            'worker_pss_kb': statistics.mean(pss for _, pss in memory),
+        }
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Fresh interpreters per import measurement (default: 5)')
+    parser.add_argument('--gunicorn', action='store_true',
+                        help='Also measure per-worker memory under gunicorn')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Gunicorn workers for --gunicorn (default: 4)')
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'import (ms)':>12} {'RSS (MB)':>10} {'pandas':>8}")
+    for label, role, eager in (('eager', 'all', True), ('all', 'all', False),
+                               ('read', 'read', False), ('ingest', 'ingest', False)):
+        result = measure_import(role, eager, args.repeat)
+        print(f"{label:<10} {result['seconds'] * 1000:>12.1f} "
+              f"{result['rss_kb'] / 1024:>10.1f} {str(result['pandas']):>8}")
+
+    if args.gunicorn:
+        print()
+        print(f"{'preload':<8} {'role':<7} {'ready (s)':>10} {'master RSS':>11} "
+              f"{'worker RSS':>11} {'worker PSS':>11}  (MB)")
+        for preload in (False, True):
+            for role in ('all', 'read'):
+                result = measure_gunicorn(args.workers, preload, role)
+                print(f"{str(preload):<8} {role:<7} {result['ready_seconds']:>10.2f} "
+                      f"{result['master_rss_kb'] / 1024:>11.1f} "
+                      f"{result['worker_rss_kb'] / 1024:>11.1f} "
+                      f"{result['worker_pss_kb'] / 1024:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+import os
+import glob
+import time
+import shutil
+import logging
+import traceback
+
+from models.movie import Movie
+from models.ingest_manifest import IngestManifest
+from utils.helpers import is_allowed_file
+
+logger = logging.getLogger(__name__)
+
+
+def _is_ingestible(path):
+    """Check if a path is a visible file with an allowed extension."""
+    name = os.path.basename(path)
+    return os.path.isfile(path) and not name.startswith('.') and is_allowed_file(name)
+
+
+def expand_paths(paths):
+    """
+    Expand files, glob patterns and directories into a list of files.
+
+    Parameters:
+    - paths: Iterable of file paths, glob patterns or directories
+
+    Returns:
+    - Sorted list of unique ingestible file paths
+    """
+    files = set()
+    for path in paths:
+        matches = glob.glob(path) if glob.has_magic(path) else [path]
+        for match in matches:
+            if os.path.isdir(match):
+                files.update(
+                    os.path.join(match, name) for name in os.listdir(match)
+                    if _is_ingestible(os.path.join(match, name))
+                )
+            elif _is_ingestible(match):
+                files.add(match)
+            else:
+                click.echo(f"Skipping {match}: not an allowed file", err=True)
+    return sorted(files)
+
+
+def _ingest_paths(files, movie_model, manifest, chunk_size, mode, workers, force):
+    """
+    Ingest a list of files and print per-file progress and throughput.
+
+    A file that fails is reported and the remaining files are still
+    ingested.
+
+    Returns:
+    - (totals, failed): summed row counts of the ingested files and the
+      list of files that failed
+    """
+    # Imported here so that registering the command does not load pandas
+    from services.ingest import ingest_file
+
+    totals = {'new': 0, 'changed': 0, 'skipped': 0, 'rows_read': 0}
+    failed = []
+    start_time = time.monotonic()
+
+    for index, file_path in enumerate(files, start=1):
+        click.echo(f"[{index}/{len(files)}] {file_path}")
+        file_start = time.monotonic()
+
+        def progress(stats):
+            elapsed = max(time.monotonic() - file_start, 1e-9)
+            click.echo(
+                f"\r  {stats['rows_read']} rows read, {stats['new']} new, "
+                f"{stats['changed']} changed, {stats['skipped']} skipped "
+                f"({stats['rows_read'] / elapsed:,.0f} rows/s)",
+                nl=False
+            )
+
+        try:
+            stats = ingest_file(
+                file_path, movie_model, manifest,
+                chunk_size=chunk_size, mode=mode, workers=workers,
+                force=force, progress=progress
+            )
+        except Exception as e:
+            logger.error(f"Error ingesting {file_path}: {str(e)}")
+            logger.error(traceback.format_exc())
+            click.echo(f"\n  failed: {str(e)}", err=True)
+            failed.append(file_path)
+            continue
+        if stats['file_skipped']:
+            click.echo("  already ingested, skipped")
+            continue
+        click.echo(f"\n  done in {stats['processing_time_seconds']:.2f}s")
+        for key in totals:
+            totals[key] += stats[key]
+
+    elapsed = max(time.monotonic() - start_time, 1e-9)
+    click.echo(
+        f"Ingested {len(files) - len(failed)} file(s): {totals['rows_read']} rows read, "
+        f"{totals['new']} new, {totals['changed']} changed, {totals['skipped']} skipped "
+        f"in {elapsed:.2f}s ({totals['rows_read'] / elapsed:,.0f} rows/s)"
+    )
+    if failed:
+        click.echo(f"{len(failed)} file(s) failed:", err=True)
+        for file_path in failed:
+            click.echo(f"  {file_path}", err=True)
+    return totals, failed
+
+
+def _refresh_snapshot(movie_model, totals):
+    """Rebuild the catalog snapshot if it is enabled and rows were written."""
+    if (totals['new'] or totals['changed']) and current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        from services.catalog_snapshot import rebuild_catalog_snapshot
+        rebuild_catalog_snapshot(movie_model.collection)
+
+
+def _move_to(file_path, subdirectory):
+    """Move a watched file into a subdirectory next to it."""
+    target_dir = os.path.join(os.path.dirname(file_path), subdirectory)
+    os.makedirs(target_dir, exist_ok=True)
+    shutil.move(file_path, os.path.join(target_dir, os.path.basename(file_path)))
+
+
+def _poll(directories, seen_sizes, movie_model, manifest, chunk_size, mode, workers,
+          force, settle):
+    """
+    Scan the watched directories once and ingest the files that have settled.
+
+    A file is ready once its size is unchanged since the previous scan and
+    it was last modified at least `settle` seconds ago. Ingested files are
+    moved to processed/, files that failed to failed/.
+    """
+    ready = []
+    for file_path in expand_paths(directories):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        if seen_sizes.get(file_path) == stat.st_size and time.time() - stat.st_mtime >= settle:
+            ready.append(file_path)
+        seen_sizes[file_path] = stat.st_size
+
+    for file_path in ready:
+        seen_sizes.pop(file_path, None)
+        totals, failed = _ingest_paths([file_path], movie_model, manifest,
+                                       chunk_size, mode, workers, force)
+        _move_to(file_path, 'failed' if failed else 'processed')
+        _refresh_snapshot(movie_model, totals)
+
+
+def _watch(directories, movie_model, manifest, chunk_size, mode, workers, force,
+           interval, settle):
+    """Poll directories and ingest files once their size has stopped changing."""
+    click.echo(f"Watching {', '.join(directories)} (Ctrl+C to stop)")
+    seen_sizes = {}
+    while True:
+        try:
+            _poll(directories, seen_sizes, movie_model, manifest, chunk_size, mode,
+                  workers, force, settle)
+        except Exception as e:
+            # Keep watching, e.g. when a file cannot be moved
+            logger.error(f"Error in watch loop: {str(e)}")
+            logger.error(traceback.format_exc())
+        time.sleep(interval)
+
+
+@click.command('ingest')
+@click.argument('paths', nargs=-1)
+@click.option('--workers', default=1, show_default=True,
+              help='Number of threads writing chunks concurrently.')
+@click.option('--chunk-size', default=1000, show_default=True,
+              help='Number of rows parsed and written per chunk.')
+@click.option('--mode', type=click.Choice(['upsert', 'overwrite']), default='upsert', show_default=True,
+              help="'upsert' writes only new or changed rows, 'overwrite' rewrites every row.")
+@click.option('--force', is_flag=True,
+              help='Ingest files even if the manifest has already seen them.')
+@click.option('--watch', is_flag=True,
+              help='Keep running and ingest new files dropped into the directories '
+                   '(default: UPLOAD_FOLDER).')
+@click.option('--interval', default=5.0, show_default=True,
+              help='Seconds between directory scans in watch mode.')
+@click.option('--settle', default=2.0, show_default=True,
+              help='Seconds a file must be unchanged before it is picked up in watch mode.')
+@with_appcontext
+def ingest_command(paths, workers, chunk_size, mode, force, watch, interval, settle):
+    """
+    Ingest local files, globs or directories into MongoDB.
+
+    Runs on the server without going through the HTTP upload limits.
+    """
+    movie_model = Movie()
+    manifest = IngestManifest()
+
+    if watch:
+        directories = list(paths) or [current_app.config['UPLOAD_FOLDER']]
+        try:
+            _watch(directories, movie_model, manifest, chunk_size, mode, workers,
+                   force, interval, settle)
+        except KeyboardInterrupt:
+            click.echo("Stopped watching")
+        return
+
+    if not paths:
+        raise click.UsageError('Provide at least one file, glob or directory, or use --watch.')
+
+    files = expand_paths(paths)
+    if not files:
+        raise click.ClickException('No ingestible files found.')
+
+    totals, failed = _ingest_paths(files, movie_model, manifest, chunk_size, mode, workers, force)
+    # Earlier files were written even if a later one failed
+    _refresh_snapshot(movie_model, totals)
+    if failed:
+        raise click.ClickException(f"{len(failed)} of {len(files)} file(s) failed to ingest.")
+
+
+@click.command('indexes')
+@with_appcontext
+def indexes_command():
+    """
+    Build the movie and manifest indices.
+
+    Run before deploying a version that changes the indices; otherwise
+    they are built on the first upload or `flask ingest`. Superseded
+    indices are dropped once their replacements exist.
+    """
+    start_time = time.monotonic()
+    if not Movie().create_indices() or not IngestManifest().create_indices():
+        raise click.ClickException('Index creation failed, see the log for details.')
+    click.echo(f"Built indices in {time.monotonic() - start_time:.2f}s")
+
+
+@click.command('snapshot')
+@with_appcontext
+def snapshot_command():
+    """
+    Build the catalog snapshot from MongoDB.
+
+    Run once after enabling CATALOG_SNAPSHOT_ENABLED; until a snapshot
+    exists, reads are served from MongoDB.
+    """
+    from services.catalog_snapshot import build_catalog_snapshot
+
+    start_time = time.monotonic()
+    snapshot = build_catalog_snapshot(Movie().collection, current_app.config['CATALOG_SNAPSHOT_DIR'])
+    click.echo(f"Built snapshot of {len(snapshot)} movies at {snapshot.directory} "
+               f"in {time.monotonic() - start_time:.2f}s")
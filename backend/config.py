@@ -10,10 +10,18 @@ class Config:
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/imdb')
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/imdb_uploads')
     MAX_CONTENT_LENGTH = 1024 * 1024 * 1024  # 1GB max upload size
-    ALLOWED_EXTENSIONS = {'csv'}
+    ALLOWED_EXTENSIONS = {'csv', 'tsv', 'parquet'}
+    # Compression suffixes accepted on top of the delimited text formats
+    COMPRESSION_EXTENSIONS = {'gz', 'zst'}
     
-    # Ensure upload directory exists
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    # Which endpoints this process serves: 'all', 'read' or 'ingest'
+    APP_ROLE = os.environ.get('APP_ROLE', 'all')
+    
+    # Optional in-process columnar read engine for the movie list. Rows
+    # served from it carry only the list fields (see SNAPSHOT_FIELDS in
+    # services/catalog_snapshot.py); build it with `flask snapshot`.
+    CATALOG_SNAPSHOT_ENABLED = os.environ.get('CATALOG_SNAPSHOT_ENABLED', 'false').lower() == 'true'
+    CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR', '/tmp/imdb_catalog')
 
 class DevelopmentConfig(Config):
     """Development configuration."""
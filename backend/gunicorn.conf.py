@@ -0,0 +1,30 @@
+import os
+import multiprocessing
+
+# Gunicorn settings, overridable through the environment:
+#   gunicorn -c gunicorn.conf.py app:app
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# POST /api/upload ingests files of up to 1 GB inside the request. A sync
+# worker cannot heartbeat while it handles a request, so the arbiter would
+# kill it after `timeout` seconds mid-ingest. Threaded workers heartbeat
+# from their main loop while requests run on worker threads, so long
+# uploads complete and `timeout` still catches hung workers. Read-only
+# workers keep the sync class.
+worker_class = os.environ.get(
+    'GUNICORN_WORKER_CLASS',
+    'sync' if os.environ.get('APP_ROLE', 'all') == 'read' else 'gthread'
+)
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app once in the master and fork workers from it, so the
+# imported code is shared copy-on-write instead of loaded per worker
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_fork(server, worker):
+    """Drop any MongoClient inherited from the master; pymongo is not fork-safe."""
+    from utils.db import reset_client
+    reset_client()
@@ -0,0 +1,83 @@
+from pymongo import ASCENDING
+from datetime import datetime
+import hashlib
+import logging
+
+from utils.db import get_db
+
+logger = logging.getLogger(__name__)
+
+class IngestManifest:
+    """Model for the manifest of files that have already been ingested."""
+
+    # Collections whose indices were already ensured by this process
+    _indexed_collections = set()
+
+    def __init__(self, db=None):
+        # If db instance is not provided, use the process-wide connection
+        if db is None:
+            self.db = get_db()
+        else:
+            self.db = db
+        self.collection = self.db.ingest_manifest
+
+        if self.collection.full_name not in IngestManifest._indexed_collections:
+            if self.create_indices():
+                IngestManifest._indexed_collections.add(self.collection.full_name)
+
+    def create_indices(self):
+        """Create a unique index on the file fingerprint; return True on success."""
+        try:
+            self.collection.create_index([("fingerprint", ASCENDING)], unique=True)
+            return True
+        except Exception as e:
+            logger.error(f"Error creating manifest indices: {str(e)}")
+            return False
+
+    @staticmethod
+    def fingerprint_file(file_path, block_size=1024 * 1024):
+        """
+        Compute a content hash of a file without loading it into memory.
+
+        Parameters:
+        - file_path: Path of the file to fingerprint
+        - block_size: Number of bytes read per iteration
+
+        Returns:
+        - Hex SHA-256 digest of the file contents
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def find(self, fingerprint):
+        """Return the manifest entry for a fingerprint, or None if unseen."""
+        try:
+            return self.collection.find_one({'fingerprint': fingerprint})
+        except Exception as e:
+            logger.error(f"Error reading ingest manifest: {str(e)}")
+            return None
+
+    def record(self, fingerprint, original_filename, stats):
+        """
+        Record a successfully ingested file in the manifest.
+
+        Parameters:
+        - fingerprint: Content hash returned by fingerprint_file
+        - original_filename: Name the file was uploaded under
+        - stats: Dict with new/changed/skipped row counts
+        """
+        try:
+            self.collection.update_one(
+                {'fingerprint': fingerprint},
+                {'$set': {
+                    'original_filename': original_filename,
+                    'stats': stats,
+                    'ingested_at': datetime.utcnow()
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error recording ingest manifest entry: {str(e)}")
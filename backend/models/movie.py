@@ -1,77 +1,393 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
-from flask import current_app
+import hashlib
 import logging
 import traceback
 import json
 import math
 
+from utils.db import get_db
+
 logger = logging.getLogger(__name__)
 
 class Movie:
     """Model for movie data in MongoDB."""
     
+    # Collections whose indices were already ensured by this process
+    _indexed_collections = set()
+    
+    # Collections whose pre-existing documents were already given record keys
+    _backfilled_collections = set()
+    
+    # Bookkeeping fields excluded from the content hash
+    _HASH_EXCLUDED_FIELDS = ('_id', 'record_key', 'content_hash')
+    
+    # Fields the list API sorts on, filters on by equality and by range
+    SORT_FIELDS = ['release_date', 'ratings', 'title', 'year']
+    EQUALITY_FILTER_FIELDS = ['language', 'genres']
+    RANGE_FILTER_FIELDS = ['year', 'ratings']
+    
+    # Indices created by earlier versions and superseded by index_specs()
+    OBSOLETE_INDEXES = [
+        'release_date_1', 'ratings_-1', 'language_1', 'year_1', 'year_1_ratings_-1',
+        'language_1_year_1_ratings_-1', 'genres_1_year_1_ratings_-1'
+    ]
+    
     def __init__(self, db=None):
-        # If db instance is not provided, create a new connection
+        # If db instance is not provided, use the process-wide connection
         if db is None:
-            client = MongoClient(current_app.config['MONGO_URI'])
-            self.db = client.get_database()
+            self.db = get_db()
         else:
             self.db = db
         self.collection = self.db.movies
+        # Indices are not built here, so a read request never waits on an
+        # index build; see ensure_indices and `flask indexes`
+    
+    @classmethod
+    def index_specs(cls):
+        """
+        Key patterns of the indices serving the list API.
+        
+        Following the equality, sort, range rule there is one index per sort
+        field, optionally prefixed by an equality filter (language, or the
+        multikey genres), followed by the range filters. Every filter and
+        sort combination is then answered by an index scan in sort order,
+        without an in-memory SORT stage; a multi-value $in on the prefix is
+        merged in order (SORT_MERGE). Direction does not matter since each
+        index has a single sort field and can be walked either way.
         
-        # Create indices for efficient querying
-        self.create_indices()
+        Together with _id and record_key that is 14 indices to maintain on
+        every inserted or changed row, a write cost paid on ingestion in
+        exchange for sort-free reads.
+        """
+        specs = []
+        for prefix in [None] + cls.EQUALITY_FILTER_FIELDS:
+            for sort_field in cls.SORT_FIELDS:
+                keys = [(prefix, ASCENDING)] if prefix else []
+                keys.append((sort_field, ASCENDING))
+                keys.extend((field, ASCENDING) for field in cls.RANGE_FILTER_FIELDS if field != sort_field)
+                specs.append(keys)
+        return specs
+    
+    def ensure_indices(self):
+        """
+        Create the indices once per process, before the first write.
+        
+        A failed attempt is retried by the next call.
+        """
+        if self.collection.full_name not in Movie._indexed_collections:
+            if self.create_indices():
+                Movie._indexed_collections.add(self.collection.full_name)
     
     def create_indices(self):
-        """Create indices for frequently queried fields."""
+        """
+        Create the list API indices and the record_key index.
+        
+        Indices superseded by index_specs() are only dropped once all of
+        their replacements exist, so queries keep an index while the new
+        ones are built.
+        
+        Returns:
+        - True if every index was created, False otherwise
+        """
         try:
-            self.collection.create_index([("release_date", ASCENDING)])
-            self.collection.create_index([("ratings", DESCENDING)])
-            self.collection.create_index([("language", ASCENDING)])
-            self.collection.create_index([("year", ASCENDING)])
+            self.collection.create_indexes([IndexModel(keys) for keys in self.index_specs()])
+            self._create_record_key_index()
+            existing = self.collection.index_information()
+            for name in self.OBSOLETE_INDEXES:
+                if name in existing:
+                    self.collection.drop_index(name)
+            return True
         except Exception as e:
             logger.error(f"Error creating indices: {str(e)}")
+            return False
+    
+    def _create_record_key_index(self):
+        """
+        Create the unique index on record_key.
+        
+        The index is sparse so documents without a key (old duplicates left
+        by the backfill) do not collide. An older non-unique index with the
+        same name is replaced.
+        """
+        existing = self.collection.index_information().get('record_key_1')
+        if existing and not existing.get('unique'):
+            self.collection.drop_index('record_key_1')
+        self.collection.create_index([("record_key", ASCENDING)], unique=True, sparse=True)
     
-    def insert_many(self, movies):
-        """Insert multiple movie documents."""
+    def _prepare_document(self, movie):
+        """Normalize release_date and derive year on a movie document in place."""
+        # Convert string dates to datetime objects for proper sorting
+        if 'release_date' in movie and movie['release_date']:
+            try:
+                movie['release_date'] = datetime.strptime(movie['release_date'], '%Y-%m-%d')
+            except (ValueError, TypeError):
+                # If date parsing fails, keep as string
+                pass
+        
+        # Extract year from release_date if possible
+        if 'release_date' in movie and isinstance(movie['release_date'], datetime):
+            movie['year'] = movie['release_date'].year
+        elif 'release_date' in movie and movie['release_date']:
+            # Try to extract year from string
+            try:
+                movie['year'] = int(str(movie['release_date']).split('-')[0])
+            except (ValueError, IndexError):
+                movie['year'] = None
+        return movie
+    
+    @staticmethod
+    def record_key(movie):
+        """
+        Build the identity key of a prepared movie document.
+        
+        The IMDb id is used when present, otherwise title and release date.
+        """
+        imdb_id = movie.get('imdb_id')
+        if isinstance(imdb_id, str) and imdb_id:
+            return f"imdb:{imdb_id}"
+        release_date = movie.get('release_date')
+        if isinstance(release_date, datetime):
+            release_date = release_date.strftime('%Y-%m-%d')
+        return f"title:{movie.get('title')}|{release_date}"
+    
+    @classmethod
+    def content_hash(cls, movie):
+        """
+        Hash the content of a prepared movie document independently of key order.
+        
+        The hash covers the stored form of the document, so documents read
+        back from MongoDB hash the same as the record they were written from.
+        """
+        content = {
+            key: value for key, value in movie.items()
+            if key not in cls._HASH_EXCLUDED_FIELDS
+        }
+        payload = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def _stamp_document(self, movie):
+        """Prepare a document and add its record_key and content_hash."""
+        document = self._prepare_document(movie)
+        document['record_key'] = self.record_key(document)
+        document['content_hash'] = self.content_hash(document)
+        return document
+    
+    def upsert_many(self, movies, skip_unchanged=True):
+        """
+        Write only new or modified movie documents.
+        
+        Each record is stored with a record_key and a content_hash of its
+        stored fields; records whose hash matches the stored one are skipped.
+        Writes are keyed upserts on the unique record_key index, so
+        concurrent writers of the same record cannot create duplicates.
+        
+        Parameters:
+        - movies: List of transformed records from CSVProcessor
+        - skip_unchanged: If False, rewrite every record without comparing hashes
+        
+        Returns:
+        - Dict with counts of new, changed and skipped records
+        
+        Write errors are logged and re-raised.
+        """
+        stats = {'new': 0, 'changed': 0, 'skipped': 0}
         if not movies:
-            return 0
+            return stats
         
         try:
-            # Convert string dates to datetime objects for proper sorting
+            # Key the chunk by record identity, the last occurrence wins
+            incoming = {}
             for movie in movies:
-                if 'release_date' in movie and movie['release_date']:
-                    try:
-                        movie['release_date'] = datetime.strptime(movie['release_date'], '%Y-%m-%d')
-                    except ValueError:
-                        # If date parsing fails, keep as string
-                        pass
-                
-                # Extract year from release_date if possible
-                if 'release_date' in movie and isinstance(movie['release_date'], datetime):
-                    movie['year'] = movie['release_date'].year
-                elif 'release_date' in movie and movie['release_date']:
-                    # Try to extract year from string
-                    try:
-                        movie['year'] = int(movie['release_date'].split('-')[0])
-                    except (ValueError, IndexError):
-                        movie['year'] = None
+                document = self._stamp_document(movie)
+                key = document['record_key']
+                if key in incoming:
+                    stats['skipped'] += 1
+                incoming[key] = document
             
-            result = self.collection.insert_many(movies)
-            return len(result.inserted_ids)
+            if skip_unchanged:
+                unchanged = {
+                    doc['record_key'] for doc in self.collection.find(
+                        {'record_key': {'$in': list(incoming.keys())}},
+                        {'record_key': 1, 'content_hash': 1}
+                    )
+                    if doc.get('content_hash') == incoming[doc['record_key']]['content_hash']
+                }
+                stats['skipped'] += len(unchanged)
+            else:
+                unchanged = set()
+            
+            operations = [
+                ReplaceOne({'record_key': key}, document, upsert=True)
+                for key, document in incoming.items() if key not in unchanged
+            ]
+            
+            if operations:
+                result = self.collection.bulk_write(operations, ordered=False)
+                stats['new'] += result.upserted_count
+                stats['changed'] += len(operations) - result.upserted_count
+            return stats
             
         except Exception as e:
-            logger.error(f"Error inserting movies: {str(e)}")
+            logger.error(f"Error upserting movies: {str(e)}")
             logger.error(traceback.format_exc())
-            return 0
+            raise
+    
+    def backfill_record_keys(self, batch_size=1000):
+        """
+        Give record_key and content_hash to documents written without them.
+        
+        Documents inserted before row-level deduplication existed would
+        otherwise never match an incoming record and be inserted again.
+        Where several old documents share a key, only the first is stamped;
+        the others are left untouched.
+        
+        Returns:
+        - Dict with counts of stamped and duplicate documents
+        """
+        stats = {'stamped': 0, 'duplicates': 0}
+        claimed = set()
+        batch = []
+        
+        def flush():
+            keys = [key for key, _, _ in batch]
+            taken = {
+                doc['record_key'] for doc in self.collection.find(
+                    {'record_key': {'$in': keys}}, {'record_key': 1}
+                )
+            }
+            operations = []
+            for key, _id, digest in batch:
+                if key in taken or key in claimed:
+                    stats['duplicates'] += 1
+                    continue
+                claimed.add(key)
+                operations.append(UpdateOne(
+                    {'_id': _id},
+                    {'$set': {'record_key': key, 'content_hash': digest}}
+                ))
+            if operations:
+                try:
+                    self.collection.bulk_write(operations, ordered=False)
+                    stats['stamped'] += len(operations)
+                except BulkWriteError as e:
+                    # Another process stamped the same key first
+                    errors = e.details.get('writeErrors', [])
+                    if any(error.get('code') != 11000 for error in errors):
+                        raise
+                    stats['stamped'] += len(operations) - len(errors)
+                    stats['duplicates'] += len(errors)
+            batch.clear()
+        
+        for doc in self.collection.find({'record_key': {'$exists': False}}):
+            batch.append((self.record_key(doc), doc['_id'], self.content_hash(doc)))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        
+        if stats['stamped'] or stats['duplicates']:
+            logger.info(f"Backfilled record keys: {stats['stamped']} stamped, "
+                        f"{stats['duplicates']} duplicates left unkeyed")
+        return stats
+    
+    def ensure_record_keys(self):
+        """
+        Run backfill_record_keys once per collection.
+        
+        Completion is recorded in the catalog_metadata collection, since
+        the unkeyed-document scan cannot use the sparse record_key index
+        and duplicates left unkeyed would make every process rescan.
+        Every document written afterwards carries a key.
+        """
+        if self.collection.full_name in Movie._backfilled_collections:
+            return
+        
+        metadata = self.db.catalog_metadata
+        marker = f"record_keys_backfilled:{self.collection.name}"
+        if metadata.find_one({'_id': marker}) is None:
+            stats = self.backfill_record_keys()
+            metadata.update_one(
+                {'_id': marker},
+                {'$set': {'completed_at': datetime.now(), **stats}},
+                upsert=True
+            )
+        Movie._backfilled_collections.add(self.collection.full_name)
+    
+    @staticmethod
+    def build_query(filters):
+        """
+        Build a MongoDB query from filter criteria.
+        
+        Parameters:
+        - filters: Dict that may contain year, year_min, year_max, rating_min,
+          language (string or list) and genres (list, matches any)
+        
+        Returns:
+        - MongoDB query dict
+        """
+        query = {}
+        
+        if 'year' in filters and filters['year']:
+            try:
+                query['year'] = int(filters['year'])
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid year filter: {filters['year']}")
+        
+        # An exact year takes precedence over a year range
+        if 'year' not in query:
+            year_range = {}
+            for key, operator in (('year_min', '$gte'), ('year_max', '$lte')):
+                if key in filters and filters[key] not in (None, ''):
+                    try:
+                        year_range[operator] = int(filters[key])
+                    except (ValueError, TypeError):
+                        logger.warning(f"Invalid {key} filter: {filters[key]}")
+            if year_range:
+                query['year'] = year_range
+        
+        if 'rating_min' in filters and filters['rating_min'] not in (None, ''):
+            try:
+                query['ratings'] = {'$gte': float(filters['rating_min'])}
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid rating_min filter: {filters['rating_min']}")
+        
+        if 'language' in filters and filters['language']:
+            languages = filters['language']
+            if isinstance(languages, str):
+                query['language'] = languages
+            elif len(languages) == 1:
+                query['language'] = languages[0]
+            else:
+                query['language'] = {'$in': list(languages)}
+        
+        if 'genres' in filters and filters['genres']:
+            genres = filters['genres']
+            if isinstance(genres, str):
+                genres = [genres]
+            query['genres'] = genres[0] if len(genres) == 1 else {'$in': list(genres)}
+        
+        return query
+    
+    @staticmethod
+    def build_sort(sort_by=None, sort_order=None):
+        """
+        Build the sort specification for a list query.
+        
+        Defaults to release_date descending when no sort field is given.
+        """
+        if not sort_by:
+            return [('release_date', DESCENDING)]
+        direction = ASCENDING if sort_order == 'asc' else DESCENDING
+        return [(sort_by, direction)]
     
     def find(self, filters=None, sort_by=None, sort_order=None, page=1, per_page=10):
         """
         Find movies with pagination, filtering and sorting.
         
         Parameters:
-        - filters: Dict of filter criteria
+        - filters: Dict of filter criteria (see build_query)
         - sort_by: Field to sort by
         - sort_order: 'asc' or 'desc'
         - page: Page number (1-indexed)
@@ -85,26 +401,11 @@ class Movie:
             
             # Apply filters if provided
             if filters:
-                if 'year' in filters and filters['year']:
-                    try:
-                        query['year'] = int(filters['year'])
-                    except (ValueError, TypeError):
-                        logger.warning(f"Invalid year filter: {filters['year']}")
-                
-                if 'language' in filters and filters['language']:
-                    query['language'] = filters['language']
+                query = self.build_query(filters)
             
             logger.debug(f"Query: {query}")
             
-            # Determine sort parameters
-            sort_params = []
-            if sort_by:
-                direction = ASCENDING if sort_order == 'asc' else DESCENDING
-                sort_params.append((sort_by, direction))
-            
-            # Default sort by release_date if no sort specified
-            if not sort_params:
-                sort_params.append(('release_date', DESCENDING))
+            sort_params = self.build_sort(sort_by, sort_order)
             
             # Calculate pagination values
             skip = (page - 1) * per_page
@@ -174,6 +475,15 @@ class Movie:
             logger.error(f"Error getting languages: {str(e)}")
             return []
     
+    def get_available_genres(self):
+        """Get a sorted list of all genres in the database."""
+        try:
+            genres = self.collection.distinct('genres')
+            return sorted(genre for genre in genres if isinstance(genre, str) and genre)
+        except Exception as e:
+            logger.error(f"Error getting genres: {str(e)}")
+            return []
+    
     def get_available_years(self):
         """Get a list of all years in the database."""
         try:
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from models.movie import Movie
+from utils.db import get_db
 import logging
 import traceback
 
@@ -7,6 +8,27 @@ import traceback
 movies_bp = Blueprint('movies', __name__, url_prefix='/api/movies')
 logger = logging.getLogger(__name__)
 
+def get_read_model():
+    """
+    Get the model serving list queries.
+    
+    The catalog snapshot (and NumPy with it) is only imported when enabled,
+    so read workers stay light by default.
+    """
+    if current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        from services.catalog_snapshot import get_catalog_snapshot
+        snapshot = get_catalog_snapshot()
+        if snapshot is not None:
+            return snapshot
+    return Movie()
+
+def parse_list_arg(name):
+    """Read a query parameter given repeatedly and/or comma-separated as a list."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(value.strip() for value in raw.split(',') if value.strip())
+    return values
+
 @movies_bp.route('', methods=['GET'])
 def get_movies():
     """
@@ -16,12 +38,17 @@ def get_movies():
     - page: Page number (default: 1)
     - per_page: Items per page (default: 10)
     - year: Filter by year of release
-    - language: Filter by language
+    - year_min / year_max: Filter by an inclusive range of release years
+    - rating_min: Filter by minimum rating
+    - language: Filter by language; repeat or comma-separate for several
+    - genres: Filter by genre; repeat or comma-separate to match any of several
     - sort_by: Field to sort by (default: release_date)
     - sort_order: 'asc' or 'desc' (default: desc)
     
     Response:
     - JSON with movies data and pagination metadata
+    
+    Served from the catalog snapshot when it is enabled, otherwise from MongoDB.
     """
     logger.info("Movies API called with params: %s", request.args)
     
@@ -30,7 +57,11 @@ def get_movies():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
         year = request.args.get('year')
-        language = request.args.get('language')
+        year_min = request.args.get('year_min')
+        year_max = request.args.get('year_max')
+        rating_min = request.args.get('rating_min')
+        languages = parse_list_arg('language')
+        genres = parse_list_arg('genres')
         sort_by = request.args.get('sort_by', 'release_date')
         sort_order = request.args.get('sort_order', 'desc')
         
@@ -47,11 +78,19 @@ def get_movies():
         filters = {}
         if year:
             filters['year'] = year
-        if language:
-            filters['language'] = language
-        
-        # Get movies from database
-        movie_model = Movie()
+        if year_min:
+            filters['year_min'] = year_min
+        if year_max:
+            filters['year_max'] = year_max
+        if rating_min:
+            filters['rating_min'] = rating_min
+        if languages:
+            filters['language'] = languages
+        if genres:
+            filters['genres'] = genres
+        
+        # Get movies from the snapshot if available, otherwise the database
+        movie_model = get_read_model()
         result = movie_model.find(
             filters=filters,
             sort_by=sort_by,
@@ -85,21 +124,24 @@ def get_filter_options():
     Get available filter options for the frontend.
     
     Response:
-    - JSON with lists of available languages and years
+    - JSON with lists of available languages, years and genres
     """
     logger.info("Filter options API called")
     
     try:
-        movie_model = Movie()
+        movie_model = get_read_model()
         
         languages = movie_model.get_available_languages()
         years = movie_model.get_available_years()
+        genres = movie_model.get_available_genres()
         
-        logger.info("Found %d languages and %d years", len(languages), len(years))
+        logger.info("Found %d languages, %d years and %d genres",
+                    len(languages), len(years), len(genres))
         
         return jsonify({
             'languages': languages,
-            'years': years
+            'years': years,
+            'genres': genres
         })
         
     except Exception as e:
@@ -117,11 +159,8 @@ def debug_movies():
     Useful for troubleshooting.
     """
     try:
-        from pymongo import MongoClient
-        
-        # Connect to MongoDB
-        client = MongoClient(current_app.config['MONGO_URI'])
-        db = client.get_database()
+        # Use the process-wide MongoDB connection
+        db = get_db()
         
         # Get the first 5 movies
         movies = list(db.movies.find().limit(5))
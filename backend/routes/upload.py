@@ -3,12 +3,12 @@ import os
 import uuid
 import shutil
 from werkzeug.utils import secure_filename
-from datetime import datetime
 import logging
 import traceback
 
-from services.csv_processor import CSVProcessor
 from models.movie import Movie
+from models.ingest_manifest import IngestManifest
+from utils.helpers import is_allowed_file
 
 # Create a Blueprint for upload-related routes
 upload_bp = Blueprint('upload', __name__, url_prefix='/api/upload')
@@ -16,22 +16,30 @@ logger = logging.getLogger(__name__)
 
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+    return is_allowed_file(filename)
 
 @upload_bp.route('', methods=['POST'])
 def upload_file():
     """
-    Handle CSV file upload and processing.
+    Handle data file upload and processing.
     
     Request: 
-    - Multipart form with 'file' field containing CSV
+    - Multipart form with 'file' field containing CSV, TSV (optionally
+      .gz or .zst compressed) or Parquet
+    - Optional 'force' field ('true') to process a file even if its
+      content was already ingested
     
     Response:
     - JSON with upload status and stats
+    
+    Files whose content was already ingested are skipped entirely; for
+    other files only new or modified rows are written.
     """
     print("Upload request received")
     
+    # The ingestion stack pulls in pandas, so it is loaded on first upload only
+    from services.ingest import ingest_file
+    
     # Check if file is in request
     if 'file' not in request.files:
         logger.warning("No file part in the request")
@@ -47,11 +55,12 @@ def upload_file():
     # Check if file is allowed
     if not allowed_file(file.filename):
         logger.warning(f"File type not allowed: {file.filename}")
-        return jsonify({'error': 'File type not allowed, please upload CSV files only'}), 400
+        return jsonify({'error': 'File type not allowed, please upload CSV, TSV (optionally .gz/.zst) or Parquet files'}), 400
     
     # Generate a unique filename to avoid collisions
     original_filename = secure_filename(file.filename)
-    unique_filename = f"{str(uuid.uuid4())}_{original_filename}"
+    # The leading dot keeps in-progress uploads away from the watch-folder ingester
+    unique_filename = f".{str(uuid.uuid4())}_{original_filename}"
     file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
     temp_copy_path = None
     
@@ -64,30 +73,45 @@ def upload_file():
         temp_copy_path = f"{file_path}_copy"
         shutil.copy2(file_path, temp_copy_path)
         
-        # Process the CSV file
+        # Process the file, skipping it if its content was already ingested
+        force = request.form.get('force', 'false').lower() == 'true'
         movie_model = Movie()
-        processor = CSVProcessor(temp_copy_path)
-        
-        # Track statistics for the response
-        total_records = 0
-        start_time = datetime.now()
+        stats = ingest_file(
+            temp_copy_path,
+            movie_model,
+            IngestManifest(),
+            original_filename=original_filename,
+            force=force
+        )
         
-        # Process in chunks to handle large files
-        for chunk in processor.process_in_chunks():
-            if chunk:
-                records_inserted = movie_model.insert_many(chunk)
-                total_records += records_inserted
+        if stats['file_skipped']:
+            return jsonify({
+                'success': True,
+                'message': 'File already ingested, nothing to do',
+                'stats': {
+                    'records_processed': 0,
+                    'processing_time_seconds': 0,
+                    'original_filename': original_filename,
+                    'file_skipped': True
+                }
+            }), 200
         
-        # Calculate processing time
-        processing_time = (datetime.now() - start_time).total_seconds()
+        # Refresh the read snapshot in the background if anything changed
+        if (stats['new'] or stats['changed']) and current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+            from services.catalog_snapshot import schedule_catalog_snapshot_rebuild
+            schedule_catalog_snapshot_rebuild(movie_model.collection)
         
         return jsonify({
             'success': True,
             'message': 'File processed successfully',
             'stats': {
-                'records_processed': total_records,
-                'processing_time_seconds': processing_time,
-                'original_filename': original_filename
+                'records_processed': stats['new'] + stats['changed'],
+                'records_new': stats['new'],
+                'records_changed': stats['changed'],
+                'records_skipped': stats['skipped'],
+                'processing_time_seconds': stats['processing_time_seconds'],
+                'original_filename': original_filename,
+                'file_skipped': False
             }
         }), 200
         
@@ -119,5 +143,6 @@ def upload_status():
     return jsonify({
         'status': 'online',
         'max_size': current_app.config['MAX_CONTENT_LENGTH'],
-        'allowed_extensions': list(current_app.config['ALLOWED_EXTENSIONS'])
+        'allowed_extensions': list(current_app.config['ALLOWED_EXTENSIONS']),
+        'compression_extensions': list(current_app.config['COMPRESSION_EXTENSIONS'])
     })
\ No newline at end of file
@@ -0,0 +1,517 @@
+import numpy as np
+import os
+import uuid
+import fcntl
+import shutil
+import threading
+from datetime import datetime
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sentinel stored for movies without a year or runtime
+MISSING_YEAR = np.iinfo(np.int32).min
+MISSING_INT = MISSING_YEAR
+
+# Name of the file pointing at the active snapshot version
+POINTER_FILE = 'CURRENT'
+
+# Lock file serializing snapshot builds across processes
+LOCK_FILE = '.lock'
+
+# Prefix of version directories still being written
+TMP_PREFIX = '.tmp-'
+
+# Fields returned for each movie when the snapshot serves the list API.
+# Long free-text fields such as overview are not part of the snapshot.
+SNAPSHOT_FIELDS = ['_id', 'title', 'original_title', 'year', 'ratings',
+                   'release_date', 'language', 'genres', 'runtime_minutes']
+
+SORT_KEYS = ['release_date', 'ratings', 'title', 'year']
+
+
+class StringTable:
+    """Read-only table of strings stored as UTF-8 bytes plus offsets."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.data[start:end]).decode('utf-8')
+
+    def to_list(self):
+        return [self[i] for i in range(len(self))]
+
+    @staticmethod
+    def encode(strings):
+        """Encode a list of strings into (data, offsets) arrays."""
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            offsets[1:] = np.cumsum([len(b) for b in encoded])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return data, offsets
+
+
+def _dictionary_encode(values):
+    """
+    Dictionary-encode a list of optional strings.
+
+    The dictionary is sorted so that comparing codes matches comparing
+    strings; missing values get code -1.
+    """
+    dictionary = sorted({v for v in values if isinstance(v, str) and v})
+    lookup = {value: code for code, value in enumerate(dictionary)}
+    codes = np.array(
+        [lookup.get(v, -1) if isinstance(v, str) else -1 for v in values],
+        dtype=np.int32
+    )
+    return codes, dictionary
+
+
+class CatalogSnapshot:
+    """
+    Memory-resident columnar snapshot of the movie list fields.
+
+    The snapshot answers the same filter, sort and page queries as
+    Movie.find without touching MongoDB, returning only SNAPSHOT_FIELDS
+    for each movie. It is written to a directory of .npy files and loaded
+    memory-mapped, so every worker process on the host shares the same pages.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+
+        self.ids = load('ids')
+        self.year = load('year')
+        self.ratings = load('ratings')
+        self.release_date = load('release_date')
+        self.release_date_text_codes = load('release_date_text_codes')
+        self.language_codes = load('language_codes')
+        self.title_codes = load('title_codes')
+        self.original_title_codes = load('original_title_codes')
+        self.runtime_minutes = load('runtime_minutes')
+        self.languages = StringTable(load('language_data'), load('language_offsets'))
+        self.titles = StringTable(load('title_data'), load('title_offsets'))
+        self.original_titles = StringTable(load('original_title_data'), load('original_title_offsets'))
+        self.genres = StringTable(load('genre_data'), load('genre_offsets'))
+        self.release_date_texts = StringTable(load('release_date_text_data'), load('release_date_text_offsets'))
+        # Flattened multi-valued genres: one (row, code) pair per entry, by row
+        self.genre_rows = load('genre_rows')
+        self.genre_codes = load('genre_codes')
+        self.orders = {key: load(f"order_{key}") for key in SORT_KEYS}
+
+        # Languages and genres are few, keep reverse lookups for filtering
+        self.language_lookup = {
+            value: code for code, value in enumerate(self.languages.to_list())
+        }
+        self.genre_lookup = {
+            value: code for code, value in enumerate(self.genres.to_list())
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, collection, base_dir):
+        """
+        Build a new snapshot from the movies collection and activate it.
+
+        Parameters:
+        - collection: pymongo collection holding the movies
+        - base_dir: Directory holding snapshot versions
+
+        Returns:
+        - The loaded CatalogSnapshot
+        """
+        os.makedirs(base_dir, exist_ok=True)
+        start_time = datetime.now()
+
+        ids, years, ratings, dates, date_texts, languages, titles = [], [], [], [], [], [], []
+        original_titles, runtimes, genre_rows, genre_values = [], [], [], []
+        projection = {field: 1 for field in SNAPSHOT_FIELDS}
+        for doc in collection.find({}, projection, batch_size=10000):
+            ids.append(str(doc['_id']))
+
+            year = doc.get('year')
+            years.append(int(year) if isinstance(year, (int, float)) and year == year else MISSING_YEAR)
+
+            rating = doc.get('ratings')
+            ratings.append(float(rating) if isinstance(rating, (int, float)) else np.nan)
+
+            # Dates Movie._prepare_document could not parse stay strings in
+            # MongoDB and are kept as text next to the parsed dates
+            release_date = doc.get('release_date')
+            dates.append(
+                np.datetime64(release_date.date(), 'D')
+                if isinstance(release_date, datetime) else np.datetime64('NaT', 'D')
+            )
+            date_texts.append(release_date if isinstance(release_date, str) else None)
+
+            languages.append(doc.get('language'))
+            titles.append(doc.get('title'))
+            original_titles.append(doc.get('original_title'))
+
+            runtime = doc.get('runtime_minutes')
+            runtimes.append(int(runtime) if isinstance(runtime, (int, float)) and runtime == runtime else MISSING_INT)
+
+            genres = doc.get('genres')
+            if isinstance(genres, list):
+                for genre in genres:
+                    if isinstance(genre, str) and genre:
+                        genre_rows.append(len(ids) - 1)
+                        genre_values.append(genre)
+
+        language_codes, language_dictionary = _dictionary_encode(languages)
+        title_codes, title_dictionary = _dictionary_encode(titles)
+        original_title_codes, original_title_dictionary = _dictionary_encode(original_titles)
+        release_date_text_codes, release_date_text_dictionary = _dictionary_encode(date_texts)
+        genre_codes, genre_dictionary = _dictionary_encode(genre_values)
+
+        columns = {
+            'ids': np.array(ids, dtype='S24'),
+            'year': np.array(years, dtype=np.int32),
+            'ratings': np.array(ratings, dtype=np.float64),
+            'release_date': np.array(dates, dtype='datetime64[D]'),
+            'release_date_text_codes': release_date_text_codes,
+            'language_codes': language_codes,
+            'title_codes': title_codes,
+            'original_title_codes': original_title_codes,
+            'runtime_minutes': np.array(runtimes, dtype=np.int32),
+            'genre_rows': np.array(genre_rows, dtype=np.int64),
+            'genre_codes': genre_codes,
+        }
+        columns['language_data'], columns['language_offsets'] = StringTable.encode(language_dictionary)
+        columns['title_data'], columns['title_offsets'] = StringTable.encode(title_dictionary)
+        columns['original_title_data'], columns['original_title_offsets'] = \
+            StringTable.encode(original_title_dictionary)
+        columns['genre_data'], columns['genre_offsets'] = StringTable.encode(genre_dictionary)
+        columns['release_date_text_data'], columns['release_date_text_offsets'] = \
+            StringTable.encode(release_date_text_dictionary)
+
+        # Presorted ascending permutations; missing values sort first as in MongoDB
+        sort_values = {
+            'ratings': np.where(np.isnan(columns['ratings']), -np.inf, columns['ratings']),
+            'title': title_codes,
+            'year': columns['year'],
+        }
+        for key in sort_values:
+            columns[f"order_{key}"] = np.argsort(sort_values[key], kind='stable').astype(np.int64)
+        # MongoDB orders release_date by type first: missing, then strings, then dates
+        date_rank = np.where(
+            ~np.isnat(columns['release_date']), 2, np.where(release_date_text_codes >= 0, 1, 0)
+        )
+        columns['order_release_date'] = np.lexsort(
+            (columns['release_date'].view(np.int64), release_date_text_codes, date_rank)
+        ).astype(np.int64)
+
+        # Write the new version next to the active one, publish it with an
+        # atomic rename, then swap the pointer. Version names sort in build
+        # order (microseconds, and builds are serialized by the build lock)
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
+        directory = os.path.join(base_dir, version)
+        tmp_directory = os.path.join(base_dir, f"{TMP_PREFIX}{version}")
+        os.makedirs(tmp_directory)
+        for name, array in columns.items():
+            np.save(os.path.join(tmp_directory, f"{name}.npy"), array)
+        os.rename(tmp_directory, directory)
+
+        pointer_tmp = os.path.join(base_dir, f".{POINTER_FILE}.{version}")
+        with open(pointer_tmp, 'w') as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(base_dir, POINTER_FILE))
+
+        cls._remove_stale_versions(base_dir, keep=version)
+
+        logger.info(f"Built catalog snapshot {version} with {len(ids)} movies "
+                    f"in {(datetime.now() - start_time).total_seconds():.2f}s")
+        return cls(directory)
+
+    @staticmethod
+    def _remove_stale_versions(base_dir, keep, retain=1):
+        """
+        Delete old snapshot versions, retaining a few for readers still switching.
+
+        Only called by the holder of the build lock, so leftover temporary
+        directories belong to builds that were interrupted.
+        """
+        versions = sorted(
+            name for name in os.listdir(base_dir)
+            if name != keep and not name.startswith('.')
+            and os.path.isdir(os.path.join(base_dir, name))
+        )
+        stale = versions[:-retain] if retain else versions
+        stale += [name for name in os.listdir(base_dir) if name.startswith(TMP_PREFIX)]
+        for name in stale:
+            shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+    @staticmethod
+    def current_version(base_dir):
+        """Return the active snapshot version name, or None if none was built."""
+        try:
+            with open(os.path.join(base_dir, POINTER_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _filter_mask(self, filters):
+        """Build a boolean row mask from the filters, or None if unfiltered."""
+        if not filters:
+            return None
+
+        mask = None
+
+        def combine(current, condition):
+            return condition if current is None else current & condition
+
+        exact_year = None
+        if 'year' in filters and filters['year']:
+            try:
+                exact_year = int(filters['year'])
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid year filter: {filters['year']}")
+
+        # As in Movie.build_query, the range applies unless an exact year parsed
+        if exact_year is not None:
+            mask = combine(mask, self.year == exact_year)
+        else:
+            # Missing years hold the smallest int32, so exclude them explicitly
+            if filters.get('year_min') not in (None, ''):
+                try:
+                    mask = combine(mask, self.year >= int(filters['year_min']))
+                except (ValueError, TypeError):
+                    logger.warning(f"Invalid year_min filter: {filters['year_min']}")
+            if filters.get('year_max') not in (None, ''):
+                try:
+                    mask = combine(mask, (self.year <= int(filters['year_max'])) & (self.year != MISSING_YEAR))
+                except (ValueError, TypeError):
+                    logger.warning(f"Invalid year_max filter: {filters['year_max']}")
+
+        if filters.get('rating_min') not in (None, ''):
+            try:
+                # NaN compares false, matching MongoDB's $gte on a missing rating
+                mask = combine(mask, self.ratings >= float(filters['rating_min']))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid rating_min filter: {filters['rating_min']}")
+
+        if 'language' in filters and filters['language']:
+            languages = filters['language']
+            if isinstance(languages, str):
+                languages = [languages]
+            codes = [self.language_lookup[lang] for lang in languages if lang in self.language_lookup]
+            mask = combine(mask, np.isin(self.language_codes, codes))
+
+        if 'genres' in filters and filters['genres']:
+            genres = filters['genres']
+            if isinstance(genres, str):
+                genres = [genres]
+            codes = [self.genre_lookup[genre] for genre in genres if genre in self.genre_lookup]
+            genre_mask = np.zeros(len(self), dtype=bool)
+            genre_mask[self.genre_rows[np.isin(self.genre_codes, codes)]] = True
+            mask = combine(mask, genre_mask)
+
+        return mask
+
+    def _row(self, index):
+        """Materialize one row as a movie dict shaped like Movie.find output."""
+        year = int(self.year[index])
+        rating = float(self.ratings[index])
+        release_date = self.release_date[index]
+        release_date_text_code = int(self.release_date_text_codes[index])
+        language_code = int(self.language_codes[index])
+        title_code = int(self.title_codes[index])
+        original_title_code = int(self.original_title_codes[index])
+        runtime = int(self.runtime_minutes[index])
+        first, last = np.searchsorted(self.genre_rows, [index, index + 1])
+        return {
+            '_id': self.ids[index].decode('ascii'),
+            'title': self.titles[title_code] if title_code >= 0 else None,
+            'original_title': self.original_titles[original_title_code] if original_title_code >= 0 else None,
+            'year': year if year != MISSING_YEAR else None,
+            'ratings': rating if not np.isnan(rating) else None,
+            'release_date': (
+                str(release_date) if not np.isnat(release_date)
+                else self.release_date_texts[release_date_text_code] if release_date_text_code >= 0
+                else None
+            ),
+            'language': self.languages[language_code] if language_code >= 0 else None,
+            'genres': [self.genres[int(code)] for code in self.genre_codes[first:last]],
+            'runtime_minutes': runtime if runtime != MISSING_INT else None,
+        }
+
+    def find(self, filters=None, sort_by=None, sort_order=None, page=1, per_page=10):
+        """
+        Find movies with pagination, filtering and sorting.
+
+        Accepts the same parameters and returns the same structure as
+        Movie.find, limited to SNAPSHOT_FIELDS. Like Movie.find, an invalid
+        page or per_page yields an empty result.
+        """
+        if page < 1 or per_page < 1:
+            return {
+                'movies': [],
+                'pagination': {
+                    'page': page,
+                    'per_page': per_page,
+                    'total_count': 0,
+                    'total_pages': 0,
+                    'has_next': False,
+                    'has_prev': False
+                }
+            }
+
+        if sort_by not in self.orders:
+            sort_by = 'release_date'
+            sort_order = 'desc'
+        order = self.orders[sort_by]
+        if sort_order != 'asc':
+            order = order[::-1]
+
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            order = order[mask[order]]
+
+        total_count = len(order)
+        skip = (page - 1) * per_page
+        movies = [self._row(int(i)) for i in order[skip:skip + per_page]]
+
+        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
+        return {
+            'movies': movies,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total_count': total_count,
+                'total_pages': total_pages,
+                'has_next': page < total_pages,
+                'has_prev': page > 1
+            }
+        }
+
+    def get_available_languages(self):
+        """Get a list of all languages in the snapshot."""
+        return self.languages.to_list()
+
+    def get_available_genres(self):
+        """Get a sorted list of all genres in the snapshot."""
+        return self.genres.to_list()
+
+    def get_available_years(self):
+        """Get a sorted list of all years in the snapshot."""
+        years = np.unique(self.year)
+        return [int(y) for y in years if y != MISSING_YEAR]
+
+
+# Per-process cache of the loaded snapshot, keyed by version
+_cache = {'version': None, 'snapshot': None}
+_cache_lock = threading.Lock()
+
+
+def get_catalog_snapshot():
+    """
+    Return the active catalog snapshot for this process.
+
+    Returns None when the snapshot is disabled, has not been built yet or
+    cannot be loaded, in which case callers should query MongoDB instead.
+    Snapshots are never built here; see build_catalog_snapshot. The
+    snapshot is reloaded whenever another process activates a newer version.
+    """
+    if not current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        return None
+
+    base_dir = current_app.config['CATALOG_SNAPSHOT_DIR']
+    version = CatalogSnapshot.current_version(base_dir)
+    if version is None:
+        return None
+    if version == _cache['version']:
+        return _cache['snapshot']
+
+    with _cache_lock:
+        if version != _cache['version']:
+            try:
+                snapshot = CatalogSnapshot(os.path.join(base_dir, version))
+            except (OSError, ValueError) as e:
+                # Missing or incompatible files, e.g. from an older layout
+                logger.warning(f"Cannot load catalog snapshot {version}: {str(e)}")
+                return None
+            _cache['version'] = version
+            _cache['snapshot'] = snapshot
+        return _cache['snapshot']
+
+
+def build_catalog_snapshot(collection, base_dir):
+    """
+    Build and activate a snapshot, one build at a time across processes.
+
+    Parameters:
+    - collection: pymongo collection holding the movies
+    - base_dir: Directory holding snapshot versions
+
+    Returns:
+    - The loaded CatalogSnapshot
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return CatalogSnapshot.build(collection, base_dir)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def rebuild_catalog_snapshot(collection):
+    """Rebuild the snapshot synchronously if the read engine is enabled."""
+    if not current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        return None
+    try:
+        return build_catalog_snapshot(collection, current_app.config['CATALOG_SNAPSHOT_DIR'])
+    except Exception as e:
+        logger.error(f"Error rebuilding catalog snapshot: {str(e)}")
+        return None
+
+
+# Per-process state of background rebuilds
+_rebuild_state = {'running': False, 'pending': False}
+_rebuild_lock = threading.Lock()
+
+
+def schedule_catalog_snapshot_rebuild(collection):
+    """
+    Rebuild the snapshot in a background thread of this process.
+
+    Used by request handlers so that the full collection scan does not run
+    inside the request. Requests arriving while a rebuild is running are
+    coalesced into a single follow-up rebuild.
+    """
+    if not current_app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        return
+    base_dir = current_app.config['CATALOG_SNAPSHOT_DIR']
+
+    with _rebuild_lock:
+        if _rebuild_state['running']:
+            _rebuild_state['pending'] = True
+            return
+        _rebuild_state['running'] = True
+
+    def run():
+        while True:
+            try:
+                build_catalog_snapshot(collection, base_dir)
+            except Exception as e:
+                logger.error(f"Error rebuilding catalog snapshot: {str(e)}")
+            with _rebuild_lock:
+                if not _rebuild_state['pending']:
+                    _rebuild_state['running'] = False
+                    return
+                _rebuild_state['pending'] = False
+
+    threading.Thread(target=run, name='catalog-snapshot-rebuild', daemon=True).start()
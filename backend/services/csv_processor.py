@@ -1,38 +1,85 @@
 import pandas as pd
+import numpy as np
 import os
+import io
 import csv
+import gzip
 from flask import current_app
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Leading bytes identifying the supported container formats
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+PARQUET_MAGIC = b'PAR1'
+
+NA_VALUES = ['\\N', 'NULL', 'nan', 'NaN', '']
+
 class CSVProcessor:
-    """Handles processing of large CSV files."""
+    """
+    Handles processing of large movie data files.
+    
+    Accepts CSV and TSV, optionally gzip or zstd compressed, and Parquet.
+    The format and delimiter are detected from the file content.
+    """
     
     def __init__(self, file_path):
         self.file_path = file_path
     
+    def detect_format(self):
+        """
+        Detect the file format from its leading bytes.
+        
+        Returns:
+        - 'parquet', 'gzip', 'zstd' or 'text'
+        """
+        with open(self.file_path, 'rb') as f:
+            header = f.read(4)
+        if header.startswith(PARQUET_MAGIC):
+            return 'parquet'
+        if header.startswith(GZIP_MAGIC):
+            return 'gzip'
+        if header.startswith(ZSTD_MAGIC):
+            return 'zstd'
+        return 'text'
+    
+    def _open_text(self, file_format):
+        """Open the file as a text stream, decompressing on the fly."""
+        if file_format == 'gzip':
+            return gzip.open(self.file_path, 'rt', encoding='utf-8', newline='')
+        if file_format == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("Reading .zst files requires the 'zstandard' package")
+            raw = open(self.file_path, 'rb')
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+            return io.TextIOWrapper(reader, encoding='utf-8', newline='')
+        return open(self.file_path, 'r', encoding='utf-8', newline='')
+    
+    @staticmethod
+    def _detect_delimiter(sample):
+        """Detect the delimiter of a delimited text sample."""
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=',\t;|').delimiter
+        except csv.Error:
+            first_line = sample.split('\n', 1)[0]
+            return '\t' if '\t' in first_line else ','
+    
     def process_in_chunks(self, chunk_size=1000):
         """
-        Process a large CSV file in chunks to avoid memory issues.
+        Process a large file in chunks to avoid memory issues.
         
         Returns:
         - Generator yielding chunks of processed data
         """
         try:
-            # First, check the file and read a small sample to understand structure
-            sample_df = pd.read_csv(self.file_path, nrows=5)
-            logger.info(f"CSV columns found: {list(sample_df.columns)}")
-            
-            # Use pandas to read and process the CSV in chunks
-            chunks = pd.read_csv(
-                self.file_path, 
-                chunksize=chunk_size,
-                dtype=str,  # Read all as strings initially to avoid type issues
-                na_values=['\\N', 'NULL', 'nan', 'NaN', ''],
-                keep_default_na=True,
-                on_bad_lines='skip'  # Skip bad lines instead of failing
-            )
+            file_format = self.detect_format()
+            if file_format == 'parquet':
+                chunks = self._read_parquet_chunks(chunk_size)
+            else:
+                chunks = self._read_text_chunks(file_format, chunk_size)
             
             for chunk in chunks:
                 # Clean and transform the data
@@ -40,9 +87,65 @@ class CSVProcessor:
                 yield processed_chunk
                 
         except Exception as e:
-            logger.error(f"Error processing CSV: {str(e)}")
+            logger.error(f"Error processing file: {str(e)}")
             raise
     
+    def _read_text_chunks(self, file_format, chunk_size):
+        """Yield DataFrame chunks of a (possibly compressed) CSV or TSV file."""
+        with self._open_text(file_format) as stream:
+            # Sniff the delimiter from the first block, then rewind the
+            # buffer by prepending it to the rest of the stream
+            sample = stream.read(64 * 1024)
+            delimiter = self._detect_delimiter(sample[:8192])
+            header = sample.split('\n', 1)[0].rstrip('\r')
+            logger.info(f"Detected {file_format} input with delimiter {delimiter!r}, "
+                        f"columns: {header.split(delimiter)}")
+            
+            # Use pandas to read and process the file in chunks
+            chunks = pd.read_csv(
+                _PrefixedStream(sample, stream),
+                sep=delimiter,
+                # IMDb TSV dumps do not quote fields and contain stray quotes
+                quoting=csv.QUOTE_NONE if delimiter == '\t' else csv.QUOTE_MINIMAL,
+                chunksize=chunk_size,
+                dtype=str,  # Read all as strings initially to avoid type issues
+                na_values=NA_VALUES,
+                keep_default_na=True,
+                on_bad_lines='skip'  # Skip bad lines instead of failing
+            )
+            for chunk in chunks:
+                yield chunk
+    
+    def _read_parquet_chunks(self, chunk_size):
+        """Yield DataFrame chunks of a Parquet file, one Arrow record batch at a time."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires the 'pyarrow' package")
+        
+        parquet_file = pq.ParquetFile(self.file_path)
+        logger.info(f"Detected parquet input with columns: {parquet_file.schema_arrow.names}")
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield self._stringify_frame(batch.to_pandas())
+    
+    @staticmethod
+    def _stringify_frame(df):
+        """
+        Convert typed Parquet columns to the strings the CSV reader produces.
+        
+        Missing values stay NaN, dates become YYYY-MM-DD and list columns
+        (e.g. genres) are joined with commas.
+        """
+        for column in df.columns:
+            series = df[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                df[column] = series.dt.strftime('%Y-%m-%d')
+                continue
+            
+            notna = series.map(lambda v: isinstance(v, (str, list, tuple, np.ndarray)) or pd.notna(v))
+            df[column] = series.map(_to_text).where(notna)
+        return df
+    
     def _transform_chunk(self, chunk):
         """
         Transform a chunk of CSV data into the required format.
@@ -130,6 +233,13 @@ class CSVProcessor:
                     from datetime import datetime
                     transformed['year'] = datetime.now().year
             
+            # Parse year when it comes from its own column (e.g. IMDb startYear)
+            elif 'year' in transformed and transformed['year']:
+                try:
+                    transformed['year'] = int(float(transformed['year']))
+                except (ValueError, TypeError):
+                    transformed['year'] = None
+            
             # Process ratings (vote_average)
             if 'ratings' in transformed and transformed['ratings']:
                 try:
@@ -169,4 +279,49 @@ class CSVProcessor:
         """Split comma-separated genres string into a list."""
         if not genres_str or pd.isna(genres_str):
             return []
-        return [g.strip() for g in str(genres_str).split(',')]
\ No newline at end of file
+        return [g.strip() for g in str(genres_str).split(',')]
+
+
+def _to_text(value):
+    """Render a Parquet cell the way it would appear in a CSV file."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (np.ndarray, np.generic)):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return ','.join(_to_text(v) for v in value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _PrefixedStream(io.TextIOBase):
+    """Text stream replaying an already-read prefix before the rest of a stream."""
+    
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+    
+    def readable(self):
+        return True
+    
+    def read(self, size=-1):
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._stream.read(), ''
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            if len(data) < size:
+                data += self._stream.read(size - len(data))
+            return data
+        return self._stream.read(size)
+    
+    def readline(self, size=-1):
+        if self._prefix:
+            line, newline, rest = self._prefix.partition('\n')
+            if newline:
+                self._prefix = rest
+                return line + newline
+            self._prefix = ''
+            return line + self._stream.readline()
+        return self._stream.readline(size)
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import logging
+
+from services.csv_processor import CSVProcessor
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODES = ['upsert', 'overwrite']
+
+
+def _write_chunk(movie_model, chunk, mode):
+    """Write one chunk and return its new/changed/skipped counts."""
+    return movie_model.upsert_many(chunk, skip_unchanged=(mode == 'upsert'))
+
+
+def ingest_file(file_path, movie_model, manifest, original_filename=None,
+                chunk_size=1000, mode='upsert', workers=1, force=False, progress=None):
+    """
+    Ingest a single file into the movies collection.
+
+    Parameters:
+    - file_path: Path of the file to ingest
+    - movie_model: Movie model used for writes
+    - manifest: IngestManifest used to skip already-seen files
+    - original_filename: Name recorded in the manifest (default: basename)
+    - chunk_size: Number of rows parsed per chunk
+    - mode: 'upsert' writes only new or changed rows, 'overwrite' rewrites
+      every row without comparing content hashes
+    - workers: Number of threads writing chunks concurrently
+    - force: Ingest even if the manifest has already seen the file
+    - progress: Optional callback receiving the running stats after each chunk
+
+    Returns:
+    - Dict with new/changed/skipped row counts, rows read, timing and
+      whether the whole file was skipped
+
+    The file is only recorded in the manifest once every chunk has been
+    written; a failed write propagates and leaves the file retryable.
+    """
+    if mode not in WRITE_MODES:
+        raise ValueError(f"Unknown write mode: {mode}")
+
+    original_filename = original_filename or os.path.basename(file_path)
+    start_time = datetime.now()
+    stats = {'new': 0, 'changed': 0, 'skipped': 0, 'rows_read': 0, 'file_skipped': False}
+
+    fingerprint = manifest.fingerprint_file(file_path)
+    if not force and manifest.find(fingerprint):
+        logger.info(f"File already ingested, skipping: {original_filename}")
+        stats['file_skipped'] = True
+        stats['processing_time_seconds'] = 0
+        return stats
+
+    # The unique record_key index must exist before keyed upserts run
+    movie_model.ensure_indices()
+
+    # Key documents written before row-level deduplication, so they are
+    # matched instead of inserted a second time
+    movie_model.ensure_record_keys()
+
+    def collect(chunk_stats):
+        for key in ('new', 'changed', 'skipped'):
+            stats[key] += chunk_stats[key]
+        if progress:
+            progress(stats)
+
+    processor = CSVProcessor(file_path)
+    if workers <= 1:
+        for chunk in processor.process_in_chunks(chunk_size=chunk_size):
+            if chunk:
+                stats['rows_read'] += len(chunk)
+                collect(_write_chunk(movie_model, chunk, mode))
+    else:
+        # Parse on this thread and keep a bounded number of writes in flight
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            for chunk in processor.process_in_chunks(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                stats['rows_read'] += len(chunk)
+                pending.append(executor.submit(_write_chunk, movie_model, chunk, mode))
+                if len(pending) >= workers * 2:
+                    collect(pending.pop(0).result())
+            for future in pending:
+                collect(future.result())
+
+    manifest.record(fingerprint, original_filename, {
+        key: stats[key] for key in ('new', 'changed', 'skipped')
+    })
+    stats['processing_time_seconds'] = (datetime.now() - start_time).total_seconds()
+    return stats
@@ -0,0 +1,30 @@
+import pytest
+
+from app import create_app
+from config import Config
+
+
+def make_config(tmp_path, role):
+    class RoleConfig(Config):
+        APP_ROLE = role
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+    return RoleConfig
+
+
+@pytest.mark.parametrize('role, blueprints', [
+    ('all', {'upload', 'movies'}),
+    ('read', {'movies'}),
+    ('ingest', {'upload'}),
+])
+def test_blueprints_follow_app_role(tmp_path, role, blueprints):
+    app = create_app(make_config(tmp_path, role))
+    assert set(app.blueprints) == blueprints
+
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    assert ('/api/upload' in rules) == ('upload' in blueprints)
+    assert ('/api/movies' in rules) == ('movies' in blueprints)
+
+
+def test_unknown_app_role(tmp_path):
+    with pytest.raises(ValueError):
+        create_app(make_config(tmp_path, 'writer'))
@@ -0,0 +1,231 @@
+"""
+The snapshot must answer list queries like Movie.find does against MongoDB.
+
+The reference below evaluates Movie.build_query's MongoDB query with
+MongoDB's matching and sort rules for the operators it uses.
+"""
+import math
+import os
+import random
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from models.movie import Movie
+from services.catalog_snapshot import (
+    POINTER_FILE, SNAPSHOT_FIELDS, TMP_PREFIX, CatalogSnapshot, build_catalog_snapshot,
+    get_catalog_snapshot
+)
+
+LANGUAGES = ['en', 'fr', 'de', 'ja']
+GENRES = ['Drama', 'Comedy', 'Action', 'Horror']
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for CatalogSnapshot.build."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None, batch_size=None):
+        return iter([
+            {key: value for key, value in doc.items() if key in projection}
+            for doc in self.docs
+        ])
+
+
+def make_docs(count=300, seed=3):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        doc = {'_id': ObjectId(), 'title': f"Movie {rng.randint(0, 10 ** 6):07d}",
+               'original_title': f"Original {i}", 'overview': 'Not part of the snapshot'}
+        if rng.random() > 0.15:
+            doc['release_date'] = datetime(rng.randint(1950, 2024), rng.randint(1, 12), rng.randint(1, 28))
+            doc['year'] = doc['release_date'].year
+        elif rng.random() > 0.5:
+            # Stored as a string when Movie._prepare_document cannot parse it
+            doc['release_date'] = rng.choice(['2010', '1999', 'TBA'])
+            if doc['release_date'].isdigit():
+                doc['year'] = int(doc['release_date'])
+        if rng.random() > 0.1:
+            doc['ratings'] = round(rng.uniform(1, 10), 1)
+        elif rng.random() > 0.5:
+            doc['ratings'] = float('nan')
+        if rng.random() > 0.05:
+            doc['language'] = rng.choice(LANGUAGES)
+        if rng.random() > 0.05:
+            doc['genres'] = rng.sample(GENRES, rng.randint(1, 2))
+        if rng.random() > 0.2:
+            doc['runtime_minutes'] = rng.randint(60, 200)
+        docs.append(doc)
+    return docs
+
+
+def matches(doc, query):
+    """Evaluate the subset of MongoDB queries produced by Movie.build_query."""
+    for field, condition in query.items():
+        value = doc.get(field)
+        values = value if isinstance(value, list) else [value]
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        def ok(v):
+            for operator, operand in condition.items():
+                if operator == '$eq' and v != operand:
+                    return False
+                if operator == '$in' and v not in operand:
+                    return False
+                numeric = isinstance(v, (int, float)) and not math.isnan(v)
+                if operator == '$gte' and not (numeric and v >= operand):
+                    return False
+                if operator == '$lte' and not (numeric and v <= operand):
+                    return False
+            return True
+
+        if not any(ok(v) for v in values):
+            return False
+    return True
+
+
+def sort_value(doc, field):
+    """
+    MongoDB compares values of different types by type: missing and NaN
+    first, then numbers, then strings, then dates.
+    """
+    value = doc.get(field)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return (0, 0)
+    if isinstance(value, datetime):
+        return (3, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (1, value)
+
+
+@pytest.fixture(scope='module')
+def docs():
+    return make_docs()
+
+
+@pytest.fixture(scope='module')
+def snapshot(docs, tmp_path_factory):
+    return CatalogSnapshot.build(FakeCollection(docs), str(tmp_path_factory.mktemp('catalog')))
+
+
+FILTERS = [
+    {},
+    {'year': 2001},
+    {'year_min': 1990, 'year_max': 2005},
+    {'year_max': 1970},
+    {'year': 'abc', 'year_min': 2015},
+    {'rating_min': 7},
+    {'language': 'fr'},
+    {'language': ['en', 'ja']},
+    {'genres': 'Drama'},
+    {'genres': ['Comedy', 'Horror']},
+    {'language': ['en', 'de'], 'genres': ['Action'], 'year_min': 1980, 'rating_min': 4.5},
+    {'language': 'xx'},
+]
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', [None, 'release_date', 'ratings', 'title', 'year'])
+@pytest.mark.parametrize('filters', FILTERS, ids=[str(f) for f in FILTERS])
+def test_find_matches_mongodb_semantics(docs, snapshot, filters, sort_by, sort_order):
+    query = Movie.build_query(filters)
+    expected = [doc for doc in docs if matches(doc, query)]
+    field, direction = Movie.build_sort(sort_by, sort_order)[0]
+    expected.sort(key=lambda doc: sort_value(doc, field), reverse=(direction < 0))
+
+    result = snapshot.find(filters, sort_by, sort_order, page=1, per_page=len(docs))
+    rows = result['movies']
+
+    assert result['pagination']['total_count'] == len(expected)
+    assert {row['_id'] for row in rows} == {str(doc['_id']) for doc in expected}
+    # Ties may come back in any order, compare the sort keys
+    by_id = {str(doc['_id']): doc for doc in docs}
+    assert [sort_value(by_id[row['_id']], field) for row in rows] == \
+        [sort_value(doc, field) for doc in expected]
+
+
+def test_find_paginates(docs, snapshot):
+    everything = snapshot.find({'genres': 'Drama'}, 'title', 'asc', page=1, per_page=len(docs))['movies']
+    pages = []
+    page = 1
+    while True:
+        result = snapshot.find({'genres': 'Drama'}, 'title', 'asc', page=page, per_page=7)
+        pages.extend(result['movies'])
+        if not result['pagination']['has_next']:
+            break
+        page += 1
+    assert [row['_id'] for row in pages] == [row['_id'] for row in everything]
+    assert result['pagination']['total_pages'] == page
+
+
+@pytest.mark.parametrize('page, per_page', [(0, 10), (-1, 10), (1, 0)])
+def test_find_rejects_invalid_pages(snapshot, page, per_page):
+    result = snapshot.find({}, page=page, per_page=per_page)
+    assert result['movies'] == []
+    assert result['pagination']['total_count'] == 0
+
+
+def test_rows_carry_snapshot_fields(docs, snapshot):
+    by_id = {str(doc['_id']): doc for doc in docs}
+    for row in snapshot.find({}, per_page=len(docs))['movies']:
+        assert set(row) == set(SNAPSHOT_FIELDS)
+        doc = by_id[row['_id']]
+        assert row['title'] == doc['title']
+        assert row['original_title'] == doc['original_title']
+        assert row['language'] == doc.get('language')
+        assert row['genres'] == doc.get('genres', [])
+        assert row['runtime_minutes'] == doc.get('runtime_minutes')
+        release_date = doc.get('release_date')
+        if isinstance(release_date, datetime):
+            release_date = release_date.strftime('%Y-%m-%d')
+        assert row['release_date'] == release_date
+
+
+def test_available_values(docs, snapshot):
+    assert snapshot.get_available_languages() == sorted({d['language'] for d in docs if 'language' in d})
+    assert snapshot.get_available_genres() == sorted({g for d in docs for g in d.get('genres', [])})
+    assert snapshot.get_available_years() == sorted({d['year'] for d in docs if 'year' in d})
+
+
+def test_build_activates_new_versions(docs, tmp_path):
+    base_dir = str(tmp_path / 'catalog')
+    assert CatalogSnapshot.current_version(base_dir) is None
+
+    versions = []
+    for count in (10, 20, 30):
+        snapshot = build_catalog_snapshot(FakeCollection(docs[:count]), base_dir)
+        assert len(snapshot) == count
+        versions.append(CatalogSnapshot.current_version(base_dir))
+
+    assert os.path.basename(snapshot.directory) == versions[-1]
+    # The active version and one predecessor are kept, nothing half-written remains
+    assert sorted(name for name in os.listdir(base_dir) if not name.startswith('.')) == \
+        sorted(versions[-2:] + [POINTER_FILE])
+    assert not [name for name in os.listdir(base_dir) if name.startswith(TMP_PREFIX)]
+
+
+def test_get_catalog_snapshot_follows_the_pointer(docs, tmp_path):
+    app = Flask(__name__)
+    app.config.update(CATALOG_SNAPSHOT_ENABLED=True, CATALOG_SNAPSHOT_DIR=str(tmp_path / 'catalog'))
+    with app.app_context():
+        # Never built on the read path
+        assert get_catalog_snapshot() is None
+        assert not os.path.exists(app.config['CATALOG_SNAPSHOT_DIR'])
+
+        build_catalog_snapshot(FakeCollection(docs[:10]), app.config['CATALOG_SNAPSHOT_DIR'])
+        first = get_catalog_snapshot()
+        assert len(first) == 10
+        assert get_catalog_snapshot() is first
+
+        build_catalog_snapshot(FakeCollection(docs[:20]), app.config['CATALOG_SNAPSHOT_DIR'])
+        assert len(get_catalog_snapshot()) == 20
+
+        app.config['CATALOG_SNAPSHOT_ENABLED'] = False
+        assert get_catalog_snapshot() is None
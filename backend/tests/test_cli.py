@@ -0,0 +1,139 @@
+import os
+import time
+
+import pytest
+
+import cli
+import services.ingest
+from app import create_app
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        CATALOG_SNAPSHOT_ENABLED = False
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def ingested(monkeypatch):
+    """Replace ingest_file; files whose name contains 'bad' fail to write."""
+    calls = []
+
+    def fake_ingest_file(file_path, movie_model, manifest, **kwargs):
+        calls.append(file_path)
+        if 'bad' in os.path.basename(file_path):
+            raise RuntimeError('write failed')
+        return {'new': 1, 'changed': 0, 'skipped': 0, 'rows_read': 1,
+                'file_skipped': False, 'processing_time_seconds': 0.0}
+
+    monkeypatch.setattr(services.ingest, 'ingest_file', fake_ingest_file)
+    return calls
+
+
+@pytest.fixture
+def refreshed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cli, '_refresh_snapshot', lambda movie_model, totals: calls.append(dict(totals)))
+    return calls
+
+
+def touch(path, content='title\nAlpha\n', age=0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_expand_paths(app_context, tmp_path):
+    data = tmp_path / 'data'
+    csv_path = touch(data / 'movies.csv')
+    tsv_path = touch(data / 'title.basics.tsv.gz')
+    touch(data / '.in-progress.csv')
+    touch(data / 'notes.txt')
+    touch(data / 'nested' / 'other.csv')
+    parquet_path = touch(tmp_path / 'extra.parquet')
+
+    assert cli.expand_paths([str(data)]) == sorted([csv_path, tsv_path])
+    assert cli.expand_paths([str(data / '*.csv'), csv_path, parquet_path]) == sorted([csv_path, parquet_path])
+    assert cli.expand_paths([str(data / 'notes.txt'), str(tmp_path / 'missing.csv')]) == []
+
+
+def test_ingest_continues_after_a_failed_file(app, tmp_path, monkeypatch, ingested, refreshed):
+    monkeypatch.setattr(cli, 'Movie', lambda: object())
+    monkeypatch.setattr(cli, 'IngestManifest', lambda: object())
+    files = [touch(tmp_path / name) for name in ('a.csv', 'b_bad.csv', 'c.csv')]
+
+    result = app.test_cli_runner().invoke(args=['ingest', *files])
+
+    assert result.exit_code == 1
+    assert ingested == files
+    assert '1 of 3 file(s) failed' in result.output
+    assert 'b_bad.csv' in result.output
+    # The snapshot still reflects the files that were written
+    assert refreshed == [{'new': 2, 'changed': 0, 'skipped': 0, 'rows_read': 2}]
+
+
+def test_ingest_succeeds(app, tmp_path, monkeypatch, ingested, refreshed):
+    monkeypatch.setattr(cli, 'Movie', lambda: object())
+    monkeypatch.setattr(cli, 'IngestManifest', lambda: object())
+
+    result = app.test_cli_runner().invoke(args=['ingest', touch(tmp_path / 'a.csv')])
+
+    assert result.exit_code == 0
+    assert 'Ingested 1 file(s)' in result.output
+
+
+def poll(watched, seen_sizes, settle=2.0):
+    cli._poll([str(watched)], seen_sizes, None, None, 1000, 'upsert', 1, False, settle)
+
+
+def test_poll_waits_for_files_to_settle(app_context, tmp_path, ingested, refreshed):
+    watched = tmp_path / 'watched'
+    fresh = touch(watched / 'fresh.csv')
+    settled = touch(watched / 'settled.csv', age=10)
+    touch(watched / '.uploading.csv', age=10)
+    seen_sizes = {}
+
+    # Sizes are only recorded on the first scan
+    poll(watched, seen_sizes)
+    assert ingested == []
+
+    poll(watched, seen_sizes)
+    assert ingested == [settled]
+    assert os.path.exists(watched / 'processed' / 'settled.csv')
+    assert os.path.exists(fresh)
+    assert os.path.exists(watched / '.uploading.csv')
+
+    # A file still growing is not picked up
+    touch(watched / 'fresh.csv', content='title\nAlpha\nBeta\n', age=10)
+    poll(watched, seen_sizes)
+    assert ingested == [settled]
+    poll(watched, seen_sizes)
+    assert ingested == [settled, fresh]
+    assert len(refreshed) == 2
+
+
+def test_poll_moves_failed_files(app_context, tmp_path, ingested, refreshed):
+    watched = tmp_path / 'watched'
+    touch(watched / 'bad.csv', age=10)
+    seen_sizes = {}
+
+    poll(watched, seen_sizes)
+    poll(watched, seen_sizes)
+
+    assert os.path.exists(watched / 'failed' / 'bad.csv')
+    assert not os.path.exists(watched / 'bad.csv')
+    # The processed/ and failed/ subdirectories are not rescanned
+    poll(watched, seen_sizes)
+    assert len(ingested) == 1
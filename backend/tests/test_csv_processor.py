@@ -0,0 +1,126 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from services.csv_processor import CSVProcessor, _PrefixedStream
+
+CSV_TEXT = (
+    'title,original_title,release_date,language,vote_average,runtime,genres\n'
+    'Alpha,Alpha,2001-05-04,en,7.5,120,"Drama,Comedy"\n'
+    'Beta,Beta Original,1999-12-31,fr,6.1,95,Horror\n'
+)
+TSV_TEXT = (
+    'tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\truntimeMinutes\tgenres\n'
+    'tt0000001\tmovie\tAlpha\tAlpha\t0\t2001\t120\tDrama,Comedy\n'
+    'tt0000002\tmovie\t"Beta\tBeta Original\t0\t\\N\t\\N\tHorror\n'
+)
+
+
+def write(path, text, compression=None):
+    data = text.encode('utf-8')
+    if compression == 'gzip':
+        data = gzip.compress(data)
+    elif compression == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+        data = zstandard.ZstdCompressor().compress(data)
+    path.write_bytes(data)
+    return str(path)
+
+
+def read_all(path, chunk_size=1):
+    return [row for chunk in CSVProcessor(path).process_in_chunks(chunk_size=chunk_size) for row in chunk]
+
+
+@pytest.mark.parametrize('name, compression, expected', [
+    ('movies.csv', None, 'text'),
+    ('movies.csv.gz', 'gzip', 'gzip'),
+    ('movies.tsv.zst', 'zstd', 'zstd'),
+    # The extension does not matter, only the content
+    ('movies.csv', 'gzip', 'gzip'),
+])
+def test_detect_format(tmp_path, name, compression, expected):
+    path = write(tmp_path / name, CSV_TEXT, compression)
+    assert CSVProcessor(path).detect_format() == expected
+
+
+def test_detect_format_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'movies.parquet'
+    pd.DataFrame({'title': ['Alpha']}).to_parquet(path, index=False)
+    assert CSVProcessor(str(path)).detect_format() == 'parquet'
+
+
+@pytest.mark.parametrize('sample, expected', [
+    (CSV_TEXT, ','),
+    (TSV_TEXT, '\t'),
+    ('title;language\nAlpha;en\nBeta;fr\n', ';'),
+    ('title|language\nAlpha|en\nBeta|fr\n', '|'),
+    # Too little to sniff: fall back on the header line
+    ('title\tlanguage\n', '\t'),
+    ('title\n', ','),
+])
+def test_detect_delimiter(sample, expected):
+    assert CSVProcessor._detect_delimiter(sample) == expected
+
+
+def test_prefixed_stream_read():
+    stream = _PrefixedStream('abc\nde', io.StringIO('f\nghi\n'))
+    assert stream.read(2) == 'ab'
+    assert stream.read(6) == 'c\ndef\n'
+    assert stream.read() == 'ghi\n'
+    assert stream.read() == ''
+
+
+def test_prefixed_stream_readline():
+    stream = _PrefixedStream('first\nsec', io.StringIO('ond\nthird\n'))
+    assert stream.readline() == 'first\n'
+    assert stream.readline() == 'second\n'
+    assert stream.readline() == 'third\n'
+    assert stream.readline() == ''
+
+
+def test_prefixed_stream_read_all():
+    stream = _PrefixedStream('head\n', io.StringIO('tail\n'))
+    assert stream.read() == 'head\ntail\n'
+
+
+@pytest.mark.parametrize('name, compression', [
+    ('movies.csv', None), ('movies.csv.gz', 'gzip'), ('movies.csv.zst', 'zstd'),
+])
+def test_process_csv(tmp_path, name, compression):
+    rows = read_all(write(tmp_path / name, CSV_TEXT, compression))
+    assert [row['title'] for row in rows] == ['Alpha', 'Beta']
+    assert rows[0]['genres'] == ['Drama', 'Comedy']
+    assert rows[0]['ratings'] == 7.5
+    assert rows[0]['year'] == 2001
+    assert rows[1]['original_title'] == 'Beta Original'
+
+
+@pytest.mark.parametrize('name, compression', [
+    ('title.basics.tsv', None), ('title.basics.tsv.gz', 'gzip'), ('title.basics.tsv.zst', 'zstd'),
+])
+def test_process_imdb_tsv(tmp_path, name, compression):
+    rows = read_all(write(tmp_path / name, TSV_TEXT, compression))
+    assert [row['imdb_id'] for row in rows] == ['tt0000001', 'tt0000002']
+    # Unquoted TSV: the stray quote is kept as part of the title
+    assert rows[1]['title'] == '"Beta'
+    assert rows[0]['genres'] == ['Drama', 'Comedy']
+    assert rows[0]['year'] == 2001
+    assert rows[0]['runtime_minutes'] == 120
+    # \N is read as missing
+    assert rows[1]['year'] is None
+    assert rows[1]['runtime_minutes'] is None
+
+
+def test_process_parquet_matches_csv(tmp_path):
+    pytest.importorskip('pyarrow')
+    csv_path = write(tmp_path / 'movies.csv', CSV_TEXT)
+    df = pd.read_csv(csv_path)
+    df['release_date'] = pd.to_datetime(df['release_date'])
+    df['genres'] = df['genres'].str.split(',')
+    parquet_path = tmp_path / 'movies.parquet'
+    df.to_parquet(parquet_path, index=False)
+
+    assert read_all(str(parquet_path)) == read_all(csv_path)
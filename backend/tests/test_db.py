@@ -0,0 +1,45 @@
+import pytest
+from flask import Flask
+
+from utils import db
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    db.reset_client()
+    yield
+    db.reset_client()
+
+
+def test_one_client_per_uri():
+    first = db.get_client('mongodb://localhost:27017/one')
+    second = db.get_client('mongodb://localhost:27017/two')
+
+    assert db.get_client('mongodb://localhost:27017/one') is first
+    assert second is not first
+    assert db.get_db('mongodb://localhost:27017/two').name == 'two'
+
+
+def test_default_uri_comes_from_app_config():
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = 'mongodb://localhost:27017/configured'
+    with app.app_context():
+        assert db.get_db().name == 'configured'
+        assert db.get_client() is db.get_client('mongodb://localhost:27017/configured')
+
+
+def test_new_client_after_fork(monkeypatch):
+    parent = db.get_client('mongodb://localhost:27017/one')
+
+    # A forked worker sees another pid and must not reuse the parent's client
+    monkeypatch.setattr(db.os, 'getpid', lambda: -1)
+    child = db.get_client('mongodb://localhost:27017/one')
+
+    assert child is not parent
+    assert db.get_client('mongodb://localhost:27017/one') is child
+
+
+def test_reset_client():
+    client = db.get_client('mongodb://localhost:27017/one')
+    db.reset_client()
+    assert db.get_client('mongodb://localhost:27017/one') is not client
@@ -0,0 +1,31 @@
+import pytest
+from flask import Flask
+
+from config import Config
+from utils.helpers import is_allowed_file
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    with app.app_context():
+        yield
+
+
+@pytest.mark.parametrize('filename, allowed', [
+    ('movies.csv', True),
+    ('movies.CSV', True),
+    ('title.basics.tsv', True),
+    ('movies.parquet', True),
+    ('title.basics.tsv.gz', True),
+    ('movies.csv.zst', True),
+    ('movies.parquet.gz', False),
+    ('movies.parquet.zst', False),
+    ('movies.gz', False),
+    ('movies.txt', False),
+    ('movies.txt.gz', False),
+    ('movies', False),
+])
+def test_is_allowed_file(app_context, filename, allowed):
+    assert is_allowed_file(filename) is allowed
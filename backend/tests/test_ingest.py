@@ -0,0 +1,275 @@
+"""
+Row-level deduplication and the ingest manifest, against an in-memory collection.
+"""
+import copy
+import uuid
+from datetime import datetime
+
+import bson
+import pytest
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from models.ingest_manifest import IngestManifest
+from models.movie import Movie
+from services.ingest import ingest_file
+
+
+class FakeBulkWriteResult:
+    def __init__(self, upserted_count):
+        self.upserted_count = upserted_count
+
+
+def matches(doc, query):
+    """Evaluate the equality, $in and $exists queries used by the models."""
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if '$in' in condition and value not in condition['$in']:
+                return False
+            if '$exists' in condition and (field in doc) != condition['$exists']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """In-memory collection enforcing a unique sparse index on unique_field."""
+
+    def __init__(self, db_name, name, unique_field=None):
+        self.name = name
+        self.full_name = f"{db_name}.{name}"
+        self.unique_field = unique_field
+        self.docs = []
+        self.queries = []
+        self.fail_writes = False
+
+    def index_information(self):
+        return {}
+
+    def create_indexes(self, models):
+        pass
+
+    def create_index(self, keys, **kwargs):
+        pass
+
+    def drop_index(self, name):
+        pass
+
+    def insert_legacy(self, doc):
+        """Store a document the way versions before record keys did."""
+        self.docs.append(bson.decode(bson.encode(dict(doc, _id=bson.ObjectId()))))
+
+    def find(self, query=None, projection=None, **kwargs):
+        query = query or {}
+        self.queries.append(query)
+        return [copy.deepcopy(doc) for doc in self.docs if matches(doc, query)]
+
+    def find_one(self, query):
+        found = self.find(query)
+        return found[0] if found else None
+
+    def _apply(self, filter_, document, upsert, replace):
+        """Apply one replace or $set update; return True if it inserted."""
+        existing = next((doc for doc in self.docs if matches(doc, filter_)), None)
+        upserted = existing is None
+        if upserted:
+            if not upsert:
+                return False
+            existing = {'_id': bson.ObjectId(), **filter_}
+            self.docs.append(existing)
+        updated = dict(document) if replace else {**existing, **document['$set']}
+        updated['_id'] = existing['_id']
+        key = updated.get(self.unique_field)
+        if key is not None and any(
+            doc is not existing and doc.get(self.unique_field) == key for doc in self.docs
+        ):
+            if upserted:
+                self.docs.remove(existing)
+            raise ValueError('duplicate key')
+        existing.clear()
+        # Store what MongoDB would return when the document is read back
+        existing.update(bson.decode(bson.encode(updated)))
+        return upserted
+
+    def update_one(self, filter_, update, upsert=False):
+        self._apply(filter_, update, upsert, replace=False)
+
+    def bulk_write(self, operations, ordered=True):
+        if self.fail_writes:
+            raise RuntimeError('write failed')
+        upserted, errors = 0, []
+        for index, operation in enumerate(operations):
+            try:
+                upserted += self._apply(operation._filter, operation._doc, operation._upsert,
+                                        replace=isinstance(operation, ReplaceOne))
+            except ValueError:
+                errors.append({'index': index, 'code': 11000})
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+        return FakeBulkWriteResult(upserted)
+
+
+class FakeDatabase:
+    def __init__(self):
+        # A fresh name per test, the models cache per-process state by collection name
+        self.name = f"test_{uuid.uuid4().hex}"
+        self.movies = FakeCollection(self.name, 'movies', unique_field='record_key')
+        self.ingest_manifest = FakeCollection(self.name, 'ingest_manifest')
+        self.catalog_metadata = FakeCollection(self.name, 'catalog_metadata')
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def movie_model(db):
+    return Movie(db=db)
+
+
+def record(title, release_date='2001-05-04', **fields):
+    """A record as produced by CSVProcessor._transform_chunk."""
+    return {'title': title, 'release_date': release_date, 'language': 'en',
+            'ratings': 7.5, 'genres': ['Drama'], **fields}
+
+
+@pytest.mark.parametrize('movie', [
+    record('Alpha'),
+    record('Alpha', imdb_id='tt0000001'),
+    record('Unparsed date', release_date='2010'),
+    record('Missing rating', ratings=float('nan'), runtime_minutes=None),
+])
+def test_key_and_hash_match_the_stored_copy(movie_model, movie):
+    stamped = movie_model._stamp_document(dict(movie))
+    stored = bson.decode(bson.encode(dict(stamped, _id=bson.ObjectId())))
+
+    assert Movie.record_key(stored) == stamped['record_key']
+    assert Movie.content_hash(stored) == stamped['content_hash']
+
+
+def test_record_key():
+    assert Movie.record_key({'imdb_id': 'tt1', 'title': 'A'}) == 'imdb:tt1'
+    assert Movie.record_key({'title': 'A', 'release_date': datetime(2001, 5, 4)}) == \
+        'title:A|2001-05-04'
+    assert Movie.record_key({'title': 'A', 'release_date': '2010'}) == 'title:A|2010'
+
+
+def test_upsert_many_counts(db, movie_model):
+    assert movie_model.upsert_many([record('Alpha'), record('Beta')]) == \
+        {'new': 2, 'changed': 0, 'skipped': 0}
+    assert movie_model.upsert_many([record('Alpha'), record('Beta')]) == \
+        {'new': 0, 'changed': 0, 'skipped': 2}
+    assert movie_model.upsert_many([record('Alpha', ratings=9.0), record('Beta'), record('Gamma')]) == \
+        {'new': 1, 'changed': 1, 'skipped': 1}
+    assert len(db.movies.docs) == 3
+    assert next(d for d in db.movies.docs if d['title'] == 'Alpha')['ratings'] == 9.0
+
+
+def test_upsert_many_duplicates_in_one_chunk(db, movie_model):
+    stats = movie_model.upsert_many([record('Alpha', ratings=5.0), record('Alpha', ratings=6.0)])
+
+    # The last occurrence wins
+    assert stats == {'new': 1, 'changed': 0, 'skipped': 1}
+    assert [d['ratings'] for d in db.movies.docs] == [6.0]
+
+
+def test_upsert_many_overwrite_rewrites_unchanged(movie_model):
+    movie_model.upsert_many([record('Alpha')])
+    assert movie_model.upsert_many([record('Alpha')], skip_unchanged=False) == \
+        {'new': 0, 'changed': 1, 'skipped': 0}
+
+
+def test_upsert_many_nan_rows_are_unchanged_on_rewrite(movie_model):
+    movie_model.upsert_many([record('Alpha', ratings=float('nan'))])
+    assert movie_model.upsert_many([record('Alpha', ratings=float('nan'))])['skipped'] == 1
+
+
+def test_upsert_many_reraises_write_errors(db, movie_model):
+    db.movies.fail_writes = True
+    with pytest.raises(RuntimeError):
+        movie_model.upsert_many([record('Alpha')])
+
+
+def test_backfill_stamps_legacy_documents_once_per_key(db, movie_model):
+    for title in ('Alpha', 'Alpha', 'Beta'):
+        db.movies.insert_legacy(movie_model._prepare_document(record(title)))
+
+    assert movie_model.backfill_record_keys(batch_size=2) == {'stamped': 2, 'duplicates': 1}
+    keys = [doc.get('record_key') for doc in db.movies.docs]
+    assert keys == ['title:Alpha|2001-05-04', None, 'title:Beta|2001-05-04']
+
+    # The stamped documents absorb the same records instead of gaining copies
+    assert movie_model.upsert_many([record('Alpha'), record('Beta')]) == \
+        {'new': 0, 'changed': 0, 'skipped': 2}
+    assert len(db.movies.docs) == 3
+
+
+def test_ensure_record_keys_runs_once_per_database(db, movie_model):
+    db.movies.insert_legacy(movie_model._prepare_document(record('Alpha')))
+    movie_model.ensure_record_keys()
+    assert db.catalog_metadata.docs[0]['stamped'] == 1
+
+    # Another process finds the marker and does not scan for unkeyed documents
+    Movie._backfilled_collections.discard(db.movies.full_name)
+    db.movies.queries.clear()
+    Movie(db=db).ensure_record_keys()
+    assert {'record_key': {'$exists': False}} not in db.movies.queries
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'movies.csv'
+    path.write_text(
+        'title,release_date,language,vote_average,genres\n'
+        'Alpha,2001-05-04,en,7.5,Drama\n'
+        'Beta,1999-12-31,fr,6.1,"Comedy,Horror"\n'
+        'Alpha,2001-05-04,en,8.0,Drama\n'
+    )
+    return str(path)
+
+
+def test_ingest_file_skips_known_files(db, movie_model, csv_file):
+    manifest = IngestManifest(db=db)
+
+    stats = ingest_file(csv_file, movie_model, manifest, chunk_size=2)
+    assert (stats['new'], stats['changed'], stats['skipped'], stats['rows_read']) == (2, 1, 0, 3)
+    assert stats['file_skipped'] is False
+    assert len(db.ingest_manifest.docs) == 1
+
+    stats = ingest_file(csv_file, movie_model, manifest)
+    assert stats['file_skipped'] is True
+    assert stats['rows_read'] == 0
+
+
+def test_ingest_file_force(db, movie_model, csv_file):
+    manifest = IngestManifest(db=db)
+    ingest_file(csv_file, movie_model, manifest)
+
+    stats = ingest_file(csv_file, movie_model, manifest, force=True)
+    assert stats['file_skipped'] is False
+    assert (stats['new'], stats['changed'], stats['skipped']) == (0, 0, 3)
+
+    stats = ingest_file(csv_file, movie_model, manifest, force=True, mode='overwrite')
+    assert (stats['new'], stats['changed'], stats['skipped']) == (0, 2, 1)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ingest_file_failed_write_leaves_file_retryable(db, movie_model, csv_file, workers):
+    manifest = IngestManifest(db=db)
+    db.movies.fail_writes = True
+    with pytest.raises(RuntimeError):
+        ingest_file(csv_file, movie_model, manifest, chunk_size=1, workers=workers)
+    assert db.ingest_manifest.docs == []
+
+    db.movies.fail_writes = False
+    stats = ingest_file(csv_file, movie_model, manifest)
+    assert stats['file_skipped'] is False
+    assert stats['new'] == 2
+
+
+def test_ingest_file_rejects_unknown_mode(db, movie_model, csv_file):
+    with pytest.raises(ValueError):
+        ingest_file(csv_file, movie_model, IngestManifest(db=db), mode='append')
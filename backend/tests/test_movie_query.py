@@ -0,0 +1,72 @@
+from pymongo import ASCENDING, DESCENDING
+
+from models.movie import Movie
+
+
+def test_build_query_empty():
+    assert Movie.build_query({}) == {}
+
+
+def test_build_query_exact_year_takes_precedence_over_range():
+    query = Movie.build_query({'year': '2001', 'year_min': 1990, 'year_max': 2010})
+    assert query == {'year': 2001}
+
+
+def test_build_query_year_range():
+    assert Movie.build_query({'year_min': '1990', 'year_max': 2010}) == \
+        {'year': {'$gte': 1990, '$lte': 2010}}
+    assert Movie.build_query({'year_min': 1990}) == {'year': {'$gte': 1990}}
+    assert Movie.build_query({'year_max': 2010, 'year_min': ''}) == {'year': {'$lte': 2010}}
+
+
+def test_build_query_ignores_invalid_numbers():
+    assert Movie.build_query({'year': 'abc', 'year_min': 'x', 'rating_min': 'high'}) == {}
+    # An invalid exact year falls back to the range
+    assert Movie.build_query({'year': 'abc', 'year_min': 1990}) == {'year': {'$gte': 1990}}
+
+
+def test_build_query_rating_min():
+    assert Movie.build_query({'rating_min': '7.5'}) == {'ratings': {'$gte': 7.5}}
+    assert Movie.build_query({'rating_min': 0}) == {'ratings': {'$gte': 0.0}}
+
+
+def test_build_query_language():
+    assert Movie.build_query({'language': 'en'}) == {'language': 'en'}
+    assert Movie.build_query({'language': ['en']}) == {'language': 'en'}
+    assert Movie.build_query({'language': ['en', 'fr']}) == {'language': {'$in': ['en', 'fr']}}
+    assert Movie.build_query({'language': []}) == {}
+
+
+def test_build_query_genres():
+    assert Movie.build_query({'genres': 'Drama'}) == {'genres': 'Drama'}
+    assert Movie.build_query({'genres': ['Drama']}) == {'genres': 'Drama'}
+    assert Movie.build_query({'genres': ['Drama', 'Comedy']}) == \
+        {'genres': {'$in': ['Drama', 'Comedy']}}
+
+
+def test_build_query_combined():
+    query = Movie.build_query({
+        'language': ['en', 'fr'], 'genres': 'Drama',
+        'year_min': 1990, 'year_max': 2000, 'rating_min': 6
+    })
+    assert query == {
+        'language': {'$in': ['en', 'fr']},
+        'genres': 'Drama',
+        'year': {'$gte': 1990, '$lte': 2000},
+        'ratings': {'$gte': 6.0},
+    }
+
+
+def test_build_sort():
+    assert Movie.build_sort() == [('release_date', DESCENDING)]
+    assert Movie.build_sort('title', 'asc') == [('title', ASCENDING)]
+    assert Movie.build_sort('ratings', 'desc') == [('ratings', DESCENDING)]
+    assert Movie.build_sort('year') == [('year', DESCENDING)]
+
+
+def test_index_specs_follow_equality_sort_range():
+    specs = [[field for field, _ in keys] for keys in Movie.index_specs()]
+    for prefix in [[]] + [[field] for field in Movie.EQUALITY_FILTER_FIELDS]:
+        for sort_field in Movie.SORT_FIELDS:
+            ranges = [f for f in Movie.RANGE_FILTER_FIELDS if f != sort_field]
+            assert prefix + [sort_field] + ranges in specs
@@ -0,0 +1,86 @@
+"""
+Check that every list query shape is served by an index in sort order.
+
+Needs a running MongoDB; set TEST_MONGO_URI to point at a server other than
+mongodb://localhost:27017. A scratch database is seeded and dropped.
+"""
+import os
+import random
+from datetime import datetime
+
+import pytest
+
+pymongo = pytest.importorskip('pymongo')
+
+from models.movie import Movie  # noqa: E402
+
+MONGO_URI = os.environ.get('TEST_MONGO_URI', 'mongodb://localhost:27017')
+DB_NAME = 'imdb_query_plan_test'
+
+FILTER_SHAPES = {
+    'none': {},
+    'language': {'language': 'en'},
+    'languages': {'language': ['en', 'fr']},
+    'genre': {'genres': 'Drama'},
+    'genres': {'genres': ['Drama', 'Comedy']},
+    'year': {'year': 2001},
+    'year_range': {'year_min': 1990, 'year_max': 2010},
+    'rating_min': {'rating_min': 7},
+    'language_year_range_rating': {'language': 'en', 'year_min': 1990, 'rating_min': 5},
+    'genre_year_range_rating': {'genres': 'Drama', 'year_max': 2010, 'rating_min': 5},
+}
+
+
+@pytest.fixture(scope='module')
+def movie_model():
+    client = pymongo.MongoClient(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+    except pymongo.errors.PyMongoError:
+        pytest.skip(f"MongoDB not reachable at {MONGO_URI}")
+
+    client.drop_database(DB_NAME)
+    db = client[DB_NAME]
+    rng = random.Random(7)
+    db.movies.insert_many([
+        {
+            'title': f"Movie {i}",
+            'release_date': datetime(rng.randint(1950, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+            'language': rng.choice(['en', 'fr', 'de', 'ja']),
+            'ratings': round(rng.uniform(1, 10), 1),
+            'genres': rng.sample(['Drama', 'Comedy', 'Action', 'Horror'], rng.randint(1, 2)),
+        }
+        for i in range(2000)
+    ])
+    db.movies.update_many({}, [{'$set': {'year': {'$year': '$release_date'}}}])
+
+    movie_model = Movie(db=db)
+    assert movie_model.create_indices()
+    yield movie_model
+    client.drop_database(DB_NAME)
+    client.close()
+
+
+def plan_stages(plan):
+    """Yield every stage name of an explain() plan tree."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', Movie.SORT_FIELDS)
+@pytest.mark.parametrize('shape', sorted(FILTER_SHAPES))
+def test_list_query_uses_index_without_sort(movie_model, shape, sort_by, sort_order):
+    query = Movie.build_query(FILTER_SHAPES[shape])
+    cursor = movie_model.collection.find(query).sort(Movie.build_sort(sort_by, sort_order)).skip(20).limit(20)
+    stages = set(plan_stages(cursor.explain()['queryPlanner']['winningPlan']))
+
+    assert 'IXSCAN' in stages
+    assert 'COLLSCAN' not in stages
+    assert 'SORT' not in stages
@@ -0,0 +1,54 @@
+import os
+import threading
+from pymongo import MongoClient
+from flask import current_app
+
+# One MongoClient per URI and process; pymongo clients are not fork-safe, so
+# the owning pid is recorded and new clients are created after a fork.
+_clients = {}
+_clients_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client(uri=None):
+    """
+    Get the MongoClient shared by this process for a URI.
+
+    Parameters:
+    - uri: MongoDB URI (default: MONGO_URI from the app config)
+
+    Returns:
+    - MongoClient created in the current process
+    """
+    global _clients, _clients_pid
+
+    uri = uri or current_app.config['MONGO_URI']
+    client = _clients.get(uri)
+    if client is not None and _clients_pid == os.getpid():
+        return client
+
+    with _client_lock:
+        if _clients_pid != os.getpid():
+            # Do not close clients inherited from the parent, it still owns them
+            _clients = {}
+            _clients_pid = os.getpid()
+        if uri not in _clients:
+            _clients[uri] = MongoClient(uri, connect=False)
+        return _clients[uri]
+
+
+def get_db(uri=None):
+    """Get the default database of the shared client."""
+    return get_client(uri).get_database()
+
+
+def reset_client():
+    """
+    Forget the clients so the next call creates fresh ones.
+
+    Called from the gunicorn post_fork hook when the app is preloaded.
+    """
+    global _clients, _clients_pid
+    with _client_lock:
+        _clients = {}
+        _clients_pid = None
@@ -49,6 +49,8 @@ def is_allowed_file(filename):
     """
     Check if a file has an allowed extension.
     
+    CSV and TSV files may also carry a compression suffix, e.g. .tsv.gz.
+    
     Parameters:
     - filename: Filename to check
     
@@ -58,7 +60,14 @@ def is_allowed_file(filename):
     if '.' not in filename:
         return False
     
-    ext = filename.rsplit('.', 1)[1].lower()
+    name, ext = filename.lower().rsplit('.', 1)
+    if ext in current_app.config['COMPRESSION_EXTENSIONS']:
+        if '.' not in name:
+            return False
+        ext = name.rsplit('.', 1)[1]
+        # Parquet is compressed internally and is read by Arrow, not as a stream
+        if ext == 'parquet':
+            return False
     return ext in current_app.config['ALLOWED_EXTENSIONS']
 
 def format_file_size(size_bytes):
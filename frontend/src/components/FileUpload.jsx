@@ -1,6 +1,9 @@
 import React, { useState, useRef } from 'react';
 import apiService from '../services/api';
 
+// File types accepted by the backend ingestion
+const ACCEPTED_EXTENSIONS = ['.csv', '.tsv', '.csv.gz', '.tsv.gz', '.csv.zst', '.tsv.zst', '.parquet'];
+
 const FileUpload = ({ onUploadSuccess }) => {
   const [file, setFile] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
@@ -30,11 +33,11 @@ const FileUpload = ({ onUploadSuccess }) => {
     e.stopPropagation();
     
     const droppedFile = e.dataTransfer.files[0];
-    if (droppedFile && droppedFile.name.endsWith('.csv')) {
+    if (droppedFile && ACCEPTED_EXTENSIONS.some((ext) => droppedFile.name.toLowerCase().endsWith(ext))) {
       setFile(droppedFile);
       setError(null);
     } else {
-      setError('Please select a CSV file');
+      setError('Please select a CSV, TSV or Parquet file');
     }
   };
 
@@ -119,7 +122,7 @@ const FileUpload = ({ onUploadSuccess }) => {
             type="file"
             ref={fileInputRef}
             onChange={handleFileChange}
-            accept=".csv"
+            accept={ACCEPTED_EXTENSIONS.join(',')}
             className="hidden"
           />
           
@@ -134,7 +137,7 @@ const FileUpload = ({ onUploadSuccess }) => {
               </label>
               <p className="pl-1">or drag and drop</p>
             </div>
-            <p className="text-xs text-gray-500">CSV files only</p>
+            <p className="text-xs text-gray-500">CSV or TSV (optionally .gz/.zst compressed) and Parquet files</p>
           </div>
           
           {file && (